@@ -1,19 +1,39 @@
-import openai
-from typing import Dict, Any, List
+from openai import OpenAI
+from typing import Dict, Any, List, Optional
 from backend.config import Config
+from backend.agents.template_compiler import TemplateCompiler
 from backend.services.vector_db import VectorDBService
+from backend.services import metrics
 
 class CoderAgent:
     def __init__(self):
-        openai.api_key = Config.OPENAI_API_KEY
-        self.model = "gpt-4"
-        self.vector_db = VectorDBService()
+        self.client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
+        self.model = Config.OPENAI_MODEL
+        self.template_compiler = TemplateCompiler() if Config.CODE_TEMPLATES_ENABLED else None
+        self._vector_db = None
     
-    def generate_code(self, plan: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate executable code from the plan"""
+    @property
+    def vector_db(self) -> VectorDBService:
+        # Only jobs that fall back to the LLM need the knowledge base
+        if self._vector_db is None:
+            self._vector_db = VectorDBService()
+        return self._vector_db
+    
+    def generate_code(self, plan: Dict[str, Any], datasets: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate executable code from the plan, from templates when every step has one"""
+        
+        if self.template_compiler:
+            with metrics.span("template_compile"):
+                code_result = self.template_compiler.compile(plan, datasets)
+            if code_result:
+                metrics.record_code_source("template")
+                return code_result
+        
+        metrics.record_code_source("llm")
         
         # Retrieve relevant code examples from vector database
-        relevant_examples = self.vector_db.search_similar_code(plan["analysis_type"])
+        with metrics.span("retrieval"):
+            relevant_examples = self.vector_db.search_similar_code(plan["analysis_type"])
         
         system_prompt = """You are an expert geospatial programmer. Generate Python code 
         using GeoPandas, Shapely, and other geospatial libraries to execute the given plan.
@@ -26,6 +46,10 @@ class CoderAgent:
             "output_description": "GeoDataFrame with buffered geometries"
         }
         
+        Input layers are available as input_data["datasets"][name], already loaded as
+        GeoDataFrames (raster layers are given as file paths). Do not read input files
+        from disk yourself. Store the final output in a variable named result.
+        
         Make sure the code is production-ready with proper error handling."""
         
         user_prompt = f"""
@@ -39,16 +63,21 @@ class CoderAgent:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1
-            )
+            with metrics.span("coder_llm"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.1
+                )
+            metrics.record_tokens("coder", getattr(response, "usage", None))
             
-            return self._parse_code_response(response.choices[0].message.content)
+            code_result = self._parse_code_response(response.choices[0].message.content)
+            if "error" not in code_result:
+                code_result["source"] = "llm"
+            return code_result
         except Exception as e:
             return {"error": f"Code generation failed: {str(e)}"}
     
@@ -1,11 +1,12 @@
-import openai
+from openai import OpenAI
 from typing import List, Dict, Any
 from backend.config import Config
+from backend.services import metrics
 
 class PlannerAgent:
     def __init__(self):
-        openai.api_key = Config.OPENAI_API_KEY
-        self.model = "gpt-4"
+        self.client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
+        self.model = Config.OPENAI_MODEL
     
     def create_plan(self, user_query: str, available_data: List[Dict]) -> Dict[str, Any]:
         """Creates a step-by-step plan for geospatial analysis"""
@@ -21,7 +22,7 @@ class PlannerAgent:
                     "step_number": 1,
                     "description": "Load and validate input data",
                     "operation": "load_data",
-                    "parameters": {"file_path": "path/to/file", "data_type": "vector"}
+                    "parameters": {"dataset_id": 1, "data_type": "vector"}
                 },
                 {
                     "step_number": 2,
@@ -32,7 +33,10 @@ class PlannerAgent:
             ],
             "expected_output": "Description of final output",
             "confidence": 0.95
-        }"""
+        }
+        
+        Load input data with one load_data step per dataset, referencing it by the
+        dataset_id shown in Available Data."""
         
         user_prompt = f"""
         User Query: {user_query}
@@ -44,14 +48,16 @@ class PlannerAgent:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1
-            )
+            with metrics.span("planner_llm"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.1
+                )
+            metrics.record_tokens("planner", getattr(response, "usage", None))
             
             return self._parse_plan_response(response.choices[0].message.content)
         except Exception as e:
@@ -61,8 +67,9 @@ class PlannerAgent:
         """Format available data for the prompt"""
         formatted = []
         for item in data_list:
-            formatted.append(f"- {item['name']}: {item['data_type']} ({item.get('description', 'No description')})")
-        return "\n".join(formatted)
+            reference = f" [dataset_id {item['id']}]" if "id" in item else ""
+            formatted.append(f"- {item['name']}{reference}: {item['data_type']} ({item.get('description', 'No description')})")
+        return "\n".join(formatted) if formatted else "No uploaded datasets match this query."
     
     def _parse_plan_response(self, response: str) -> Dict[str, Any]:
         """Parse and validate the plan response"""
@@ -0,0 +1,269 @@
+import functools
+import keyword
+import os
+import re
+from typing import Callable, Dict, Any, List, Optional
+
+# Distance units accepted in plan parameters, in meters
+UNITS_IN_METERS = {
+    "m": 1.0, "meter": 1.0, "meters": 1.0, "metre": 1.0, "metres": 1.0,
+    "km": 1000.0, "kilometer": 1000.0, "kilometers": 1000.0, "kilometre": 1000.0, "kilometres": 1000.0,
+    "ft": 0.3048, "foot": 0.3048, "feet": 0.3048,
+    "mi": 1609.344, "mile": 1609.344, "miles": 1609.344,
+}
+
+SJOIN_HOW = {"inner", "left", "right"}
+SJOIN_PREDICATES = {"intersects", "within", "contains", "overlaps", "crosses", "touches",
+                    "covers", "covered_by", "contains_properly"}
+OVERLAY_HOW = {"intersection", "union", "identity", "symmetric_difference", "difference"}
+ZONAL_STATISTICS = {"count", "sum", "mean", "min", "max", "std", "median"}
+
+# Steps that only describe presenting the result, which the platform already does
+PRESENTATION_OPERATIONS = {"validate_data", "visualize", "display", "export", "export_results", "save_results"}
+
+# Names the execution environment or the templates themselves use, which layer
+# variables must not shadow
+RESERVED_NAMES = {"gpd", "pd", "np", "input_data", "result", "reproject", "local_crs", "to_local_crs",
+                  "rasterio", "features", "windows", "src", "zones", "window", "values", "labels",
+                  "valid", "pixels", "zone_stats", "statistic"}
+
+TEMPLATES: Dict[str, Callable] = {}
+
+class UnsupportedPlan(Exception):
+    """The plan needs something the templates cannot express; fall back to the LLM"""
+
+def template(*operations: str):
+    """Register a code template for one or more plan operations"""
+    def register(func):
+        for operation in operations:
+            TEMPLATES[operation] = func
+        return func
+    return register
+
+class CompileState:
+    """Layers produced so far while walking the plan, as (variable, kind) pairs"""
+
+    def __init__(self, datasets: Dict[str, Dict[str, Any]]):
+        self.datasets = datasets
+        self.layers: List[List[str]] = []
+        self.lines: List[str] = []
+        self.names: set = set()
+        self.datasets_used: set = set()
+        self.dependencies = ["geopandas", "pandas", "numpy"]
+
+    def variable(self, base: str) -> str:
+        """A fresh, readable Python identifier"""
+        base = re.sub(r"\W+", "_", base).strip("_").lower() or "layer"
+        if base[0].isdigit() or keyword.iskeyword(base) or base in RESERVED_NAMES:
+            base = f"layer_{base}"
+        name, suffix = base, 2
+        while name in self.names:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        self.names.add(name)
+        return name
+
+    def pop_vector(self) -> str:
+        """Take the most recent vector layer off the stack"""
+        for i in range(len(self.layers) - 1, -1, -1):
+            if self.layers[i][1] == "vector":
+                return self.layers.pop(i)[0]
+        raise UnsupportedPlan("operation needs a vector layer")
+
+    def pop_raster(self) -> str:
+        for i in range(len(self.layers) - 1, -1, -1):
+            if self.layers[i][1] == "raster":
+                return self.layers.pop(i)[0]
+        raise UnsupportedPlan("operation needs a raster layer")
+
+    def push(self, variable: str, kind: str = "vector"):
+        self.layers.append([variable, kind])
+
+class TemplateCompiler:
+    """Deterministic plan-to-code compiler for the common analysis operations.
+
+    Each plan step is looked up in ``TEMPLATES``; steps work on a stack of layers in
+    load order, so unary operations (buffer) replace the most recent layer and binary
+    operations (spatial_join, distance, overlay) combine the two most recent ones, left
+    first. Plans with any operation or parameter the templates do not cover compile
+    to None so the caller can ask the LLM instead.
+    """
+
+    def compile(self, plan: Dict[str, Any], datasets: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """Return a code result like CoderAgent's, or None if the plan is not supported"""
+        try:
+            return self._compile(plan, datasets or {})
+        except (UnsupportedPlan, KeyError, TypeError, ValueError):
+            return None
+
+    def supports(self, plan: Dict[str, Any]) -> bool:
+        return all(_operation(step) in TEMPLATES or _operation(step) in PRESENTATION_OPERATIONS
+                   for step in plan.get("steps", []))
+
+    def _compile(self, plan: Dict[str, Any], datasets: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        if not plan.get("steps") or not self.supports(plan):
+            raise UnsupportedPlan("plan has operations without a template")
+
+        state = CompileState(datasets)
+        operations = []
+        for step in sorted(plan["steps"], key=lambda s: s.get("step_number", 0)):
+            operation = _operation(step)
+            if operation in PRESENTATION_OPERATIONS:
+                continue
+            TEMPLATES[operation](state, step.get("parameters") or {})
+            operations.append(operation)
+
+        if len(state.layers) != 1 or state.layers[0][1] != "vector":
+            raise UnsupportedPlan("plan does not reduce to a single vector layer")
+        state.lines.append(f"result = {state.layers[0][0]}")
+
+        return {
+            "code": "\n".join(state.lines) + "\n",
+            "dependencies": state.dependencies,
+            "input_requirements": sorted(state.datasets_used),
+            "output_description": plan.get("expected_output", "GeoDataFrame"),
+            "operations": operations,
+            "source": "template"
+        }
+
+def _operation(step: Dict[str, Any]) -> str:
+    return str(step.get("operation", "")).strip().lower().replace(" ", "_").replace("-", "_")
+
+def _meters(parameters: Dict[str, Any], key: str) -> float:
+    """A distance parameter converted to meters"""
+    units = str(parameters.get("units", "meters")).lower()
+    if units not in UNITS_IN_METERS:
+        raise UnsupportedPlan(f"unknown units {units}")
+    return float(parameters[key]) * UNITS_IN_METERS[units]
+
+def _choice(parameters: Dict[str, Any], key: str, allowed: set, default: str) -> str:
+    value = str(parameters.get(key, default)).lower()
+    if value not in allowed:
+        raise UnsupportedPlan(f"unsupported {key} {value}")
+    return value
+
+def _align(state: CompileState, layer: str, target: str):
+    """Bring layer into target's CRS only when they differ"""
+    state.lines.append(f"if {layer}.crs != {target}.crs:")
+    state.lines.append(f"    {layer} = reproject({layer}, {target}.crs)")
+
+def _drop_join_index(state: CompileState, layer: str):
+    """Remove the index column a join adds, which a later join on the layer refuses"""
+    state.lines.append(f"{layer} = {layer}.drop(columns=['index_left', 'index_right'], errors='ignore')")
+
+@template("load_data", "load", "read_data")
+def load_data(state: CompileState, parameters: Dict[str, Any]):
+    name = None
+    for dataset_name, reference in state.datasets.items():
+        if ("dataset_id" in parameters and str(reference["dataset_id"]) == str(parameters["dataset_id"])) or \
+                ("file_path" in parameters and reference["file_path"] == parameters["file_path"]):
+            name = dataset_name
+            break
+    if name is None:
+        raise UnsupportedPlan("load_data step does not reference an available dataset")
+
+    kind = "raster" if state.datasets[name].get("data_type") == "raster" else "vector"
+    variable = state.variable(os.path.splitext(os.path.basename(name))[0])
+    state.lines.append(f"{variable} = input_data['datasets'][{name!r}]")
+    state.push(variable, kind)
+    state.datasets_used.add(name)
+
+@template("buffer", "buffer_analysis")
+def buffer(state: CompileState, parameters: Dict[str, Any]):
+    layer = state.pop_vector()
+    output = state.variable(f"{layer}_buffer")
+    if str(parameters.get("units", "meters")).lower() in ("degree", "degrees"):
+        distance = float(parameters["distance"])
+        state.lines.append(f"{output} = {layer}.assign(geometry={layer}.geometry.buffer({distance!r}))")
+    else:
+        # Buffer in the local projected CRS so the distance is true meters, then project back
+        distance = _meters(parameters, "distance")
+        state.lines.append(f"{output} = to_local_crs({layer})")
+        state.lines.append(f"{output} = {output}.assign(geometry={output}.geometry.buffer({distance!r}))")
+        state.lines.append(f"{output} = reproject({output}, {layer}.crs)")
+    state.push(output)
+
+@template("spatial_join", "sjoin", "join")
+def spatial_join(state: CompileState, parameters: Dict[str, Any]):
+    right = state.pop_vector()
+    left = state.pop_vector()
+    how = _choice(parameters, "how", SJOIN_HOW, "inner")
+    predicate = _choice(parameters, "predicate", SJOIN_PREDICATES, parameters.get("op", "intersects"))
+    output = state.variable(f"{left}_{right}")
+    _align(state, right, left)
+    state.lines.append(f"{output} = gpd.sjoin({left}, {right}, how={how!r}, predicate={predicate!r})")
+    _drop_join_index(state, output)
+    state.push(output)
+
+@template("distance", "distance_analysis", "nearest")
+def distance(state: CompileState, parameters: Dict[str, Any]):
+    if "target_point" in parameters or not parameters.get("to_nearest", True):
+        raise UnsupportedPlan("only nearest-feature distances have a template")
+    right = state.pop_vector()
+    left = state.pop_vector()
+    max_distance = _meters(parameters, "max_distance") if parameters.get("max_distance") is not None else None
+    output = state.variable(f"{left}_nearest")
+    projected = state.variable(f"{left}_local")
+    # Measure in meters in a CRS local to the left layer, then return in its CRS
+    state.lines.append(f"{projected} = to_local_crs({left})")
+    state.lines.append(
+        f"{output} = gpd.sjoin_nearest({projected}, reproject({right}, {projected}.crs), "
+        f"how='left', max_distance={max_distance!r}, distance_col='distance')"
+    )
+    state.lines.append(f"{output} = reproject({output}, {left}.crs)")
+    _drop_join_index(state, output)
+    state.push(output)
+
+@template("overlay")
+def overlay(state: CompileState, parameters: Dict[str, Any], default_how: str = "intersection"):
+    right = state.pop_vector()
+    left = state.pop_vector()
+    how = _choice(parameters, "how", OVERLAY_HOW, default_how)
+    output = state.variable(f"{left}_{how}")
+    _align(state, right, left)
+    state.lines.append(f"{output} = gpd.overlay({left}, {right}, how={how!r}, keep_geom_type=True)")
+    state.push(output)
+
+# Each set operation is an overlay that defaults to its own name as the how
+for _how in sorted(OVERLAY_HOW):
+    template(_how)(functools.partial(overlay, default_how=_how))
+
+@template("zonal_stats", "zonal_statistics")
+def zonal_stats(state: CompileState, parameters: Dict[str, Any]):
+    raster = state.pop_raster()
+    zones = state.pop_vector()
+    statistics = parameters.get("statistics", parameters.get("stats", ["mean"]))
+    if isinstance(statistics, str):
+        statistics = [statistics]
+    statistics = [{"average": "mean", "minimum": "min", "maximum": "max"}.get(str(s).lower(), str(s).lower())
+                  for s in statistics]
+    if not statistics or any(s not in ZONAL_STATISTICS for s in statistics):
+        raise UnsupportedPlan("unsupported zonal statistic")
+    band = int(parameters.get("band", 1))
+    all_touched = bool(parameters.get("all_touched", False))
+    output = state.variable(f"{zones}_stats")
+    state.dependencies.append("rasterio")
+
+    # Burn zone numbers into a label grid over the zones' window, then aggregate all
+    # pixels per label at once instead of masking the raster polygon by polygon.
+    # Where zones overlap, a pixel counts towards the zone drawn last.
+    state.lines.extend([
+        "import rasterio",
+        "from rasterio import features, windows",
+        f"with rasterio.open({raster}) as src:",
+        f"    zones = reproject({zones}, src.crs) if src.crs and {zones}.crs != src.crs else {zones}",
+        "    window = windows.from_bounds(*zones.total_bounds, transform=src.transform)",
+        "    window = window.round_offsets().round_lengths().intersection(windows.Window(0, 0, src.width, src.height))",
+        f"    values = src.read({band}, window=window, masked=True)",
+        "    labels = features.rasterize(",
+        "        ((geometry, number) for number, geometry in enumerate(zones.geometry) if geometry is not None and not geometry.is_empty),",
+        f"        out_shape=values.shape, transform=src.window_transform(window), fill=-1, dtype='int32', all_touched={all_touched!r}",
+        "    )",
+        "valid = (labels >= 0) & ~np.ma.getmaskarray(values)",
+        "pixels = pd.DataFrame({'zone': labels[valid], 'value': np.asarray(values)[valid]})",
+        f"zone_stats = pixels.groupby('zone')['value'].agg({statistics!r}).reindex(range(len({zones})))",
+        *(["zone_stats['count'] = zone_stats['count'].fillna(0).astype('int64')"] if "count" in statistics else []),
+        f"{output} = {zones}.copy()",
+        f"for statistic in {statistics!r}:",
+        f"    {output}[statistic] = zone_stats[statistic].to_numpy()",
+    ])
+    state.push(output)
@@ -3,16 +3,19 @@ import subprocess
 import json
 from typing import Dict, Any, Optional
 from backend.services.execution_engine import ExecutionEngine
+from backend.services import metrics
 
 class ValidatorAgent:
     def __init__(self):
         self.execution_engine = ExecutionEngine()
     
-    def validate_and_execute(self, code_result: Dict[str, Any], input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_and_execute(self, code_result: Dict[str, Any], input_data: Dict[str, Any],
+                             profile: bool = False) -> Dict[str, Any]:
         """Validate and execute the generated code"""
         
         # Step 1: Static code validation
-        static_validation = self._validate_code_syntax(code_result["code"])
+        with metrics.span("validation"):
+            static_validation = self._validate_code_syntax(code_result["code"])
         if not static_validation["valid"]:
             return {
                 "success": False,
@@ -25,7 +28,8 @@ class ValidatorAgent:
             execution_result = self.execution_engine.execute_code(
                 code_result["code"],
                 input_data,
-                code_result.get("dependencies", [])
+                code_result.get("dependencies", []),
+                profile=profile
             )
             
             if execution_result["success"]:
@@ -35,19 +39,22 @@ class ValidatorAgent:
                     return {
                         "success": True,
                         "result": execution_result["result"],
-                        "validation_report": output_validation["report"]
+                        "validation_report": output_validation["report"],
+                        "execution_info": execution_result.get("execution_info", {})
                     }
                 else:
                     return {
                         "success": False,
                         "error": f"Output validation failed: {output_validation['error']}",
-                        "stage": "output_validation"
+                        "stage": "output_validation",
+                        "execution_info": execution_result.get("execution_info", {})
                     }
             else:
                 return {
                     "success": False,
                     "error": f"Execution failed: {execution_result['error']}",
-                    "stage": "execution"
+                    "stage": "execution",
+                    "execution_info": execution_result.get("execution_info", {})
                 }
         
         except Exception as e:
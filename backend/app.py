@@ -1,22 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
 import uvicorn
 import os
 
-from backend.models.database import get_db, create_tables, GeospatialJob, GeospatialData
-from backend.services.job_queue import JobQueue, process_geospatial_job
+from backend.models.database import get_db, GeospatialJob, GeospatialData
+from backend.services.job_queue import JobQueue, submit_job, summarize_dataset
+from backend.services.tile_service import TileService
+from backend.services import metrics
 from backend.config import Config
 
-app = FastAPI(title="AI-Powered Geospatial Analysis Platform", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup; the schema is managed by backend.models.migrate"""
+    app.state.job_queue = JobQueue()
+    app.state.tile_service = TileService()
+    yield
 
-# Create database tables
-create_tables()
+app = FastAPI(title="AI-Powered Geospatial Analysis Platform", version="1.0.0", lifespan=lifespan)
 
-# Initialize services
-job_queue = JobQueue()
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+def get_tile_service(request: Request) -> TileService:
+    return request.app.state.tile_service
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
@@ -28,8 +38,11 @@ async def read_root():
         return HTMLResponse(content=f.read())
 
 @app.post("/api/jobs/")
-async def create_job(request: Dict[str, Any], db: Session = Depends(get_db)):
+async def create_job(request: Dict[str, Any], db: Session = Depends(get_db),
+                     job_queue: JobQueue = Depends(get_job_queue)):
     """Create a new geospatial analysis job"""
+    # An optional [west, south, east, north] area, e.g. the map view, ranks datasets covering it first
+    bbox = parse_bbox(request.get("bbox"))
     try:
         # Create job record
         job = GeospatialJob(
@@ -44,30 +57,103 @@ async def create_job(request: Dict[str, Any], db: Session = Depends(get_db)):
         job_queue.enqueue_job(str(job.id), {"query": request.get("query", "")})
         
         # Start processing (in production, this would be handled by Celery workers)
-        process_geospatial_job.delay(str(job.id))
+        submit_job(str(job.id), profile=bool(request.get("profile", False)), bbox=bbox)
         
         return {"job_id": job.id, "status": "pending"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_bbox(bbox: Any) -> Optional[List[float]]:
+    """Validate a [west, south, east, north] bounding box in degrees, clamped to the world"""
+    if bbox is None:
+        return None
+    try:
+        west, south, east, north = (float(value) for value in bbox)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="bbox must be [west, south, east, north]")
+    if west > east or south > north:
+        raise HTTPException(status_code=400, detail="bbox must be [west, south, east, north]")
+    return [max(west, -180.0), max(south, -90.0), min(east, 180.0), min(north, 90.0)]
+
 @app.get("/api/jobs/{job_id}")
-async def get_job_status(job_id: int, db: Session = Depends(get_db)):
+async def get_job_status(job_id: int, include_data: bool = True, db: Session = Depends(get_db)):
     """Get job status and results"""
     job = db.query(GeospatialJob).filter(GeospatialJob.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    result = job.result
+    if not include_data and isinstance(result, dict) and result.get("type") == "GeoDataFrame":
+        # Clients drawing vector results from tiles only need the summary; tables are still shown in full
+        result = {key: value for key, value in result.items() if key != "data"}
+    
     return {
         "job_id": job.id,
         "status": job.status,
         "created_at": job.created_at.isoformat(),
         "plan": job.plan,
         "code": job.code,
-        "result": job.result,
+        "result": result,
         "error_message": job.error_message,
         "is_completed": job.is_completed
     }
 
+@app.get("/api/jobs/{job_id}/metrics")
+async def get_job_metrics(job_id: int, db: Session = Depends(get_db)):
+    """Get per-stage timings, token counts and sizes recorded for a job"""
+    job = db.query(GeospatialJob).filter(GeospatialJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {"job_id": job.id, "status": job.status, "metrics": job.metrics}
+
+@app.get("/api/jobs/{job_id}/profile")
+async def get_job_profile(job_id: int, db: Session = Depends(get_db)):
+    """Get the hot functions, allocations and CPU time of a job created with "profile": true"""
+    job = db.query(GeospatialJob).filter(GeospatialJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.profile:
+        raise HTTPException(status_code=404, detail="Job has no profile")
+    
+    return {"job_id": job.id, "status": job.status, "profile": job.profile}
+
+def get_tileable_job(job_id: int, db: Session):
+    """Check a job has a vector result; returns a loader for the full result.
+
+    Only the result type is queried here, so requests served from the tile
+    cache never load or parse the (possibly multi-MB) result itself.
+    """
+    row = db.query(GeospatialJob.is_completed, GeospatialJob.result["type"].as_string()) \
+        .filter(GeospatialJob.id == job_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not row[0] or row[1] != "GeoDataFrame":
+        raise HTTPException(status_code=404, detail="Job has no vector result")
+    return lambda: db.query(GeospatialJob.result).filter(GeospatialJob.id == job_id).scalar()
+
+@app.get("/api/jobs/{job_id}/tiles.json")
+def get_job_tilejson(job_id: int, db: Session = Depends(get_db),
+                     tile_service: TileService = Depends(get_tile_service)):
+    """TileJSON metadata for a job's vector tiles"""
+    load_result = get_tileable_job(job_id, db)
+    return tile_service.tilejson(job_id, load_result, f"/api/jobs/{job_id}/tiles/{{z}}/{{x}}/{{y}}.mvt")
+
+@app.get("/api/jobs/{job_id}/tiles/{z}/{x}/{y}.mvt")
+def get_job_tile(job_id: int, z: int, x: int, y: int, db: Session = Depends(get_db),
+                 tile_service: TileService = Depends(get_tile_service)):
+    """Mapbox Vector Tile of a job's result geometries"""
+    if not 0 <= z <= Config.TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+    
+    load_result = get_tileable_job(job_id, db)
+    tile = tile_service.get_tile(job_id, load_result, z, x, y)
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
 @app.get("/api/jobs/")
 async def list_jobs(db: Session = Depends(get_db)):
     """List all jobs"""
@@ -109,11 +195,14 @@ async def upload_data(file: UploadFile = File(...), db: Session = Depends(get_db
             name=file.filename,
             data_type=data_type,
             file_path=file_path,
-            metadata={"original_filename": file.filename, "size": len(content)}
+            metadata_={"original_filename": file.filename, "size": len(content)}
         )
         db.add(data_record)
         db.commit()
         
+        # Extent and schema for the dataset catalog are read by a worker
+        summarize_dataset.delay(data_record.id)
+        
         return {"message": "File uploaded successfully", "data_id": data_record.id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -128,11 +217,17 @@ async def list_data(db: Session = Depends(get_db)):
             "name": item.name,
             "data_type": item.data_type,
             "created_at": item.created_at.isoformat(),
-            "metadata": item.metadata
+            "metadata": item.metadata_
         }
         for item in data
     ]
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics of the web process"""
+    content, content_type = metrics.export()
+    return Response(content=content, media_type=content_type)
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
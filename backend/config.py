@@ -7,9 +7,54 @@ class Config:
     DATABASE_URL = os.getenv("DATABASE_URL")
     REDIS_URL = os.getenv("REDIS_URL")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # any OpenAI-compatible server
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
     CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
     CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
     
+    # Worker-node cache of decoded input layers, shared by all jobs on the node
+    DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "cache/datasets")
+    DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(8 * 1024 ** 3)))
+    
+    # Memoized execution results, keyed by code and dataset versions
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache/results")
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    
+    # Vector tiles of job results
+    TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", "cache/tiles")
+    TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_BYTES", str(1024 ** 3)))
+    TILE_INDEX_MAX_JOBS = int(os.getenv("TILE_INDEX_MAX_JOBS", "16"))
+    TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "18"))
+    
+    # Per-stage timing spans, stored per job and exported to Prometheus
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+    
+    # Compile plans made only of known operations from vetted templates instead of calling the coder LLM
+    CODE_TEMPLATES_ENABLED = os.getenv("CODE_TEMPLATES_ENABLED", "true").lower() == "true"
+    
+    # Datasets offered to the planner: best catalog matches, within a prompt token budget
+    CATALOG_TOP_K = int(os.getenv("CATALOG_TOP_K", "8"))
+    CATALOG_PROMPT_TOKENS = int(os.getenv("CATALOG_PROMPT_TOKENS", "600"))
+    CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "300"))
+    
+    # Opt-in per-job profiling of generated code. More than one tracemalloc frame
+    # attributes allocations to generated lines, but slows allocation-heavy reads several-fold
+    PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+    
+    # Job pipeline: "split" runs LLM stages on the I/O queue and execution on the CPU queue,
+    # "single" runs each job as one task on the default queue
+    PIPELINE_MODE = os.getenv("PIPELINE_MODE", "split")
+    IO_QUEUE = os.getenv("IO_QUEUE", "io")
+    CPU_QUEUE = os.getenv("CPU_QUEUE", "cpu")
+    
+    # Worker autoscaling (--autoscale=max,min): grow until the queued work is expected
+    # to start within the target wait, using the measured task duration
+    AUTOSCALE_TARGET_WAIT_SECONDS = float(os.getenv("AUTOSCALE_TARGET_WAIT_SECONDS", "2"))
+    AUTOSCALE_INITIAL_TASK_SECONDS = float(os.getenv("AUTOSCALE_INITIAL_TASK_SECONDS", "1"))
+    
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM = "HS256"
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean
+from sqlalchemy import create_engine, event, inspect, Column, Integer, String, Text, DateTime, JSON, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -19,6 +19,8 @@ class GeospatialJob(Base):
     result = Column(JSON)
     error_message = Column(Text)
     is_completed = Column(Boolean, default=False)
+    metrics = Column(JSON)  # per-stage timings, token counts and sizes
+    profile = Column(JSON)  # cProfile/tracemalloc summary of the generated code, when requested
 
 class GeospatialData(Base):
     __tablename__ = "geospatial_data"
@@ -27,11 +29,24 @@ class GeospatialData(Base):
     name = Column(String(255), nullable=False)
     data_type = Column(String(50))  # vector, raster
     file_path = Column(String(500))
-    metadata = Column(JSON)
+    metadata_ = Column("metadata", JSON)  # "metadata" is reserved on declarative models
     created_at = Column(DateTime, default=datetime.utcnow)
 
+@event.listens_for(GeospatialData, "after_update")
+@event.listens_for(GeospatialData, "after_delete")
+def invalidate_cached_results(mapper, connection, target):
+    """Drop memoized execution results computed from a changed dataset"""
+    from backend.services.result_cache import ResultCache
+    
+    state = inspect(target)
+    if not state.deleted and not state.attrs.file_path.history.has_changes():
+        return  # e.g. the catalog storing a summary in metadata
+    ResultCache().invalidate_dataset(target.id)
+
 # Database setup
-engine = create_engine(Config.DATABASE_URL)
+# SQLite connections are shared across the worker's threads
+connect_args = {"check_same_thread": False, "timeout": 30} if Config.DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(Config.DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_tables():
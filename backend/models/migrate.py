@@ -0,0 +1,47 @@
+"""Create or upgrade the database schema.
+
+Run once per deployment, before the web and worker processes start:
+
+    python -m backend.models.migrate
+
+Missing tables are created, and columns added to the models since a table
+was created are added in place, so existing deployments pick up new nullable
+columns (such as ``geospatial_jobs.metrics``) without a manual ALTER.
+"""
+import logging
+from typing import List
+from sqlalchemy import inspect, text
+from backend.models.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+def migrate() -> List[str]:
+    """Bring the schema up to date with the models; returns the statements applied"""
+    applied = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(bind=connection)
+                applied.append(f"CREATE TABLE {table.name}")
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                statement = f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                connection.execute(text(statement))
+                applied.append(statement)
+
+    return applied
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    statements = migrate()
+    for statement in statements:
+        logger.info(statement)
+    logger.info("Schema up to date (%d change%s)", len(statements), "" if len(statements) == 1 else "s")
@@ -0,0 +1,127 @@
+import logging
+import math
+import multiprocessing
+import time
+from typing import Dict, Any
+from celery import signals
+from celery.worker import state
+from celery.worker.autoscale import Autoscaler
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest task duration in the moving average
+SERVICE_TIME_SMOOTHING = 0.2
+
+# Prefork workers rescale on every task message as well as on the timer, so the broker
+# queue depth (a round trip per queue) is re-read at most this often
+BROKER_DEPTH_MAX_AGE_SECONDS = 1.0
+
+# Run time of the tasks finished since the autoscaler last looked, as [total seconds,
+# count]. It is shared memory created when the worker imports the app, before the pool
+# forks, so prefork children add to the same counters the main process reads.
+_finished = multiprocessing.Array("d", 2)
+_started: Dict[str, float] = {}
+
+@signals.task_prerun.connect
+def _task_started(task_id=None, **kwargs):
+    _started[task_id] = time.monotonic()
+
+@signals.task_postrun.connect
+def _task_finished(task_id=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    with _finished.get_lock():
+        _finished[0] += time.monotonic() - started
+        _finished[1] += 1
+
+class QueueDepthAutoscaler(Autoscaler):
+    """Worker autoscaler sized from queue depth and task latency (--autoscale=max,min).
+
+    Celery's default scales to the number of prefetched messages, which only reflects
+    the prefetch limit. This one counts the tasks waiting in the worker and in the
+    broker queues it consumes, and runs enough slots for that backlog to start within
+    AUTOSCALE_TARGET_WAIT_SECONDS at the measured average task duration: LLM stages
+    that mostly wait get many slots, CPU-bound executions only as many as are needed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service_seconds = Config.AUTOSCALE_INITIAL_TASK_SECONDS
+        self._qty = 0
+        self._connection = None
+        self._depth = 0
+        self._depth_read_at = None
+
+    def _maybe_scale(self, req=None):
+        # The base class reads qty twice per tick; measure the backlog once
+        self._qty = self._desired_concurrency()
+        return super()._maybe_scale(req)
+
+    @property
+    def qty(self) -> int:
+        return self._qty
+
+    @property
+    def processes(self) -> int:
+        # The gevent pool reports its running greenlets rather than its size
+        if getattr(self.pool, "is_green", False):
+            return self.pool._pool.size
+        return self.pool.num_processes
+
+    def info(self) -> Dict[str, Any]:
+        info = super().info()
+        info["service_seconds"] = round(self.service_seconds, 3)
+        return info
+
+    def _desired_concurrency(self) -> int:
+        """Slots for the running tasks plus enough to start the backlog within the target wait"""
+        self._update_service_time()
+        active = len(state.active_requests)
+        waiting = len(state.reserved_requests) - active + self._broker_depth()
+        if waiting <= 0:
+            return active
+        return active + math.ceil(waiting * self.service_seconds / Config.AUTOSCALE_TARGET_WAIT_SECONDS)
+
+    def _update_service_time(self):
+        """Fold the run times of tasks finished since the last tick into the moving average"""
+        with _finished.get_lock():
+            total, count = _finished[0], int(_finished[1])
+            _finished[0] = _finished[1] = 0.0
+        if count:
+            # As count moving-average steps, each at the mean run time of this tick's tasks
+            weight = 1 - (1 - SERVICE_TIME_SMOOTHING) ** count
+            self.service_seconds += weight * (total / count - self.service_seconds)
+
+    def _broker_depth(self) -> int:
+        """Messages waiting in the broker queues this worker consumes, up to BROKER_DEPTH_MAX_AGE_SECONDS old"""
+        now = time.monotonic()
+        if self._depth_read_at is None or now - self._depth_read_at >= BROKER_DEPTH_MAX_AGE_SECONDS:
+            self._depth = self._read_broker_depth()
+            self._depth_read_at = now
+        return self._depth
+
+    def _read_broker_depth(self) -> int:
+        consumer = getattr(self.worker, "consumer", None)
+        task_consumer = getattr(consumer, "task_consumer", None)
+        if task_consumer is None:
+            return 0
+        try:
+            if self._connection is None:
+                self._connection = self.worker.app.connection_for_read()
+            channel = self._connection.default_channel
+            return sum(channel.queue_declare(queue=queue.name, passive=True).message_count
+                       for queue in task_consumer.queues)
+        except Exception as e:
+            logger.debug("Could not read queue depth: %s", e)
+            self._release_connection()
+            return 0
+
+    def _release_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.release()
+            except Exception:
+                pass
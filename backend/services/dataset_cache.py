@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, Tuple
+from backend.config import Config
+from backend.utils.disk_cache import atomic_write, directory_size, evict_lru, touch
+
+# Sidecar files that belong to a shapefile and change its decoded contents
+SHAPEFILE_SIDECARS = ('.shx', '.dbf', '.prj', '.cpg')
+
+logger = logging.getLogger(__name__)
+
+class DatasetCache:
+    """Worker-node cache of decoded vector layers stored as Arrow IPC files.
+
+    Entries are keyed by ``GeospatialData.id`` plus a hash of the source file
+    contents, so a replaced upload never serves stale geometry. Cached files are
+    memory-mapped on load, which lets concurrent jobs share the same page cache
+    instead of each decoding its own copy of the layer.
+    """
+
+    _stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_loaded": 0}
+    _stats_lock = threading.Lock()
+    _hash_memo: Dict[Tuple[Tuple[str, int, float], ...], str] = {}
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or Config.DATASET_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.DATASET_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, data_id: Any, file_path: str):
+        """Return the layer as a GeoDataFrame, decoding it only on a cache miss"""
+        cache_path = self._cache_path(data_id, self.content_hash(file_path))
+
+        try:
+            size = os.path.getsize(cache_path)
+            gdf = self._read_arrow(cache_path)
+            touch(cache_path)
+            self._record("hits", bytes_loaded=size)
+            return gdf
+        except FileNotFoundError:
+            pass  # not cached, or evicted by another process since
+        except Exception as e:
+            logger.warning("Discarding unreadable dataset cache entry %s: %s", cache_path, e)
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+
+        import geopandas as gpd
+
+        gdf = gpd.read_file(file_path)
+        data = self._to_arrow_bytes(gdf)
+        self._record("misses", bytes_loaded=len(data))
+        if len(data) > self.max_bytes:
+            # Caching it would evict everything else, itself included
+            return gdf
+
+        atomic_write(cache_path, data)
+        # Map the freshly written file so the miss path returns the same
+        # shared, memory-mapped representation as a hit
+        gdf = self._read_arrow(cache_path)
+
+        evicted = evict_lru(self.cache_dir, self.max_bytes, suffix=".arrow", keep=[cache_path])
+        if evicted:
+            self._record("evictions", count=len(evicted))
+        return gdf
+
+    def content_hash(self, file_path: str) -> str:
+        """Hash the file contents, memoized per path, size and mtime"""
+        paths = [file_path]
+        stem, ext = os.path.splitext(file_path)
+        if ext.lower() == '.shp':
+            paths += [stem + sidecar for sidecar in SHAPEFILE_SIDECARS if os.path.exists(stem + sidecar)]
+
+        memo_key = tuple(
+            (os.path.abspath(path), stat.st_size, stat.st_mtime)
+            for path, stat in ((path, os.stat(path)) for path in paths)
+        )
+        cached = self._hash_memo.get(memo_key)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        content_hash = digest.hexdigest()
+        self._hash_memo[memo_key] = content_hash
+        return content_hash
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for this worker process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["cache_bytes"] = directory_size(self.cache_dir, suffix=".arrow")
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def _cache_path(self, data_id: Any, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{data_id}-{content_hash[:32]}.arrow")
+
+    def _record(self, counter: str, count: int = 1, bytes_loaded: int = 0):
+        with self._stats_lock:
+            self._stats[counter] += count
+            self._stats["bytes_loaded"] += bytes_loaded
+
+    def _to_arrow_bytes(self, gdf) -> bytes:
+        """Encode a GeoDataFrame as an uncompressed Arrow IPC file with WKB geometry"""
+        import pandas as pd
+        import pyarrow as pa
+
+        geometry_name = gdf.geometry.name
+        attributes = pd.DataFrame(gdf.drop(columns=[geometry_name]))
+        try:
+            table = pa.Table.from_pandas(attributes, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns cannot be typed by Arrow
+            for column in attributes.select_dtypes(include="object").columns:
+                attributes[column] = attributes[column].astype(str)
+            table = pa.Table.from_pandas(attributes, preserve_index=False)
+
+        table = table.append_column(geometry_name, pa.array(gdf.geometry.to_wkb(), type=pa.binary()))
+        table = table.replace_schema_metadata({
+            b"geospatial": json.dumps({
+                "geometry_column": geometry_name,
+                "crs": gdf.crs.to_wkt() if gdf.crs else None
+            }).encode()
+        })
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def _read_arrow(self, cache_path: str):
+        """Memory-map a cached layer; only the geometry column is decoded"""
+        import geopandas as gpd
+        import pyarrow as pa
+
+        with pa.memory_map(cache_path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+
+        geo_meta = json.loads(table.schema.metadata[b"geospatial"])
+        geometry_name = geo_meta["geometry_column"]
+        geometry = gpd.GeoSeries.from_wkb(table.column(geometry_name).to_numpy(zero_copy_only=False))
+
+        # split_blocks keeps null-free numeric columns as views over the mapped buffers
+        attributes = table.drop([geometry_name]).to_pandas(split_blocks=True)
+        attributes[geometry_name] = geometry.values
+        return gpd.GeoDataFrame(attributes, geometry=geometry_name, crs=geo_meta["crs"])
+
+
+class CachedDatasets(Mapping):
+    """Read-only mapping of dataset name to layer, loaded lazily through the cache.
+
+    Each value passed in is a reference such as
+    ``{"dataset_id": 3, "file_path": "uploads/roads.geojson", "data_type": "vector"}``.
+    Vector layers resolve to GeoDataFrames; anything else resolves to its file
+    path so the generated code can open it itself (e.g. rasters via rasterio).
+    """
+
+    def __init__(self, references: Dict[str, Dict[str, Any]], cache: DatasetCache):
+        self._references = references
+        self._cache = cache
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._loaded:
+            reference = self._references[name]
+            if reference.get("data_type", "vector") == "vector":
+                self._loaded[name] = self._cache.load(reference["dataset_id"], reference["file_path"])
+            else:
+                self._loaded[name] = reference["file_path"]
+        return self._loaded[name]
+
+    def __iter__(self):
+        return iter(self._references)
+
+    def __len__(self):
+        return len(self._references)
@@ -0,0 +1,297 @@
+import logging
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about which dataset a query needs
+STOPWORDS = {
+    "a", "about", "all", "an", "and", "any", "are", "at", "by", "each", "every", "find", "for", "from",
+    "get", "how", "in", "into", "is", "it", "its", "me", "near", "of", "on", "or", "show", "that", "the",
+    "their", "them", "there", "to", "what", "where", "which", "with", "within", "data", "dataset", "layer",
+    "file", "geojson", "json", "shp", "tif", "tiff", "csv", "gpkg"
+}
+
+# Name matches count this much more than matches on columns or descriptions
+NAME_WEIGHT = 2.0
+
+# Score multiplier for datasets overlapping the area of interest
+SPATIAL_BOOST = 2.0
+
+# Columns listed per dataset before the rest are elided
+SUMMARY_COLUMNS = 8
+
+# Best keyword matches considered when picking the top-k for coverage
+RERANK_CANDIDATES = 256
+
+@lru_cache(maxsize=65536)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Lowercase word tokens with camelCase, snake_case and plurals folded"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    tokens = []
+    for token in re.findall(r"[a-z]+|\d+", text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tuple(tokens)
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count, about four characters per token"""
+    return len(text) // 4 + 1
+
+class DatasetCatalog:
+    """Searchable index of the uploaded datasets, used to pick what the planner sees.
+
+    Datasets are ranked by IDF-weighted keyword overlap between the query and their
+    name, columns and description. An STRtree over dataset extents (WGS84, from the
+    summaries computed in the worker) then boosts datasets overlapping the area of
+    interest: the bbox sent with the job, or else the extent of the best keyword
+    match, so layers covering the same place rank together. Only the top-k entries
+    that fit the prompt token budget are returned, as one-line schema summaries.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        import numpy as np
+        import shapely
+
+        self.entries: List[Dict[str, Any]] = []
+        name_postings: Dict[str, List[int]] = {}
+        text_postings: Dict[str, List[int]] = {}
+
+        for record in records:
+            index = len(self.entries)
+            metadata = record.get("metadata") or {}
+            summary = metadata.get("summary") or {}
+            self.entries.append({
+                "id": record["id"],
+                "name": record["name"],
+                "data_type": record.get("data_type") or "unknown",
+                "summary": summary,
+                "description": metadata.get("description")
+            })
+
+            name_tokens = set(tokenize(record["name"]))
+            text_tokens = set(tokenize(" ".join(summary.get("columns", []))))
+            text_tokens.update(tokenize(metadata.get("description") or ""))
+            text_tokens.update(tokenize(summary.get("geometry_type") or ""))
+            for token in name_tokens:
+                name_postings.setdefault(token, []).append(index)
+            for token in text_tokens - name_tokens:
+                text_postings.setdefault(token, []).append(index)
+
+        # Posting lists as sorted index arrays, so scoring is a few vectorized adds
+        self._name_postings = {token: np.array(hits) for token, hits in name_postings.items()}
+        self._text_postings = {token: np.array(hits) for token, hits in text_postings.items()}
+
+        # Extents of the datasets summarized so far; the rest are matched on keywords only
+        self.bounds = np.full((len(self.entries), 4), np.nan)
+        for index, entry in enumerate(self.entries):
+            if entry["summary"].get("bounds"):
+                self.bounds[index] = entry["summary"]["bounds"]
+        self._indexed = np.flatnonzero(~np.isnan(self.bounds).any(axis=1))
+        self._tree = shapely.STRtree(shapely.box(*self.bounds[self._indexed].T)) if len(self._indexed) else None
+
+    @classmethod
+    def from_db(cls, db) -> "DatasetCatalog":
+        from backend.models.database import GeospatialData
+
+        rows = db.query(GeospatialData.id, GeospatialData.name, GeospatialData.data_type, GeospatialData.metadata_)
+        return cls({"id": row[0], "name": row[1], "data_type": row[2], "metadata": row[3]} for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, bbox: Optional[Sequence[float]] = None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries ranked by relevance to the query, best first"""
+        import numpy as np
+
+        top_k = top_k or Config.CATALOG_TOP_K
+        weights = self._keyword_weights(query)
+        scores = weights.sum(axis=1)
+
+        in_area = self._intersecting(tuple(bbox)) if bbox else None
+        if scores.any() and (in_area is None or not scores[in_area].any()):
+            # No bbox, or one holding none of the keyword matches (such as the map's
+            # default view): favour the area of the best match instead
+            best = int(np.argmax(scores))
+            if not np.isnan(self.bounds[best][0]):
+                in_area = self._intersecting(tuple(self.bounds[best]))
+
+        boost = np.ones(len(self.entries))
+        if in_area is not None:
+            boost[in_area] = SPATIAL_BOOST
+            if not scores.any():
+                # No keyword matched: offer what covers the requested area
+                weights = np.zeros((len(self.entries), 1))
+                weights[in_area] = 1.0
+
+        return [self.entries[index] for index in self._select(weights, boost, top_k)]
+
+    def _select(self, weights, boost, top_k: int) -> List[int]:
+        """Greedy top-k where a query term already covered by a pick counts for less.
+
+        Several versions of one layer (roads_2019, roads_2020, ...) would otherwise
+        fill every slot and crowd out the other layers a multi-dataset query needs.
+        """
+        import numpy as np
+
+        # The best matches of each query term, so no single term's layers take the whole pool
+        scores = weights.sum(axis=1) * boost
+        per_term = max(RERANK_CANDIDATES // weights.shape[1], top_k)
+        pool = []
+        for column in range(weights.shape[1]):
+            matches = np.flatnonzero(weights[:, column])
+            if len(matches) > per_term:
+                matches = matches[np.argpartition(-scores[matches], per_term)[:per_term]]
+            pool.append(matches)
+        candidates = np.unique(np.concatenate(pool))
+        # Newest first among equal scores
+        candidates = candidates[np.lexsort((-candidates, -scores[candidates]))]
+
+        weights, boost = weights[candidates], boost[candidates]
+        covered = np.zeros(weights.shape[1])
+        available = np.ones(len(candidates), dtype=bool)
+        selected = []
+        while len(selected) < min(top_k, len(candidates)):
+            gains = np.where(available, (weights / (1.0 + covered)).sum(axis=1) * boost, -np.inf)
+            pick = int(np.argmax(gains))
+            selected.append(int(candidates[pick]))
+            available[pick] = False
+            covered += weights[pick] > 0
+        return selected
+
+    def prompt_entries(self, entries: List[Dict[str, Any]], token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search results as planner inputs, cut off at the prompt token budget"""
+        token_budget = token_budget or Config.CATALOG_PROMPT_TOKENS
+        selected, used = [], 0
+        for entry in entries:
+            item = {
+                "id": entry["id"],
+                "name": entry["name"],
+                "data_type": entry["data_type"],
+                "description": describe(entry["summary"], entry["description"])
+            }
+            cost = estimate_tokens(f"- {item['name']} [dataset_id {item['id']}]: {item['data_type']} ({item['description']})")
+            if selected and used + cost > token_budget:
+                break
+            selected.append(item)
+            used += cost
+        return selected
+
+    def _keyword_weights(self, query: str):
+        """Per-entry, per-query-term IDF weights; name matches count NAME_WEIGHT times more"""
+        import numpy as np
+
+        tokens = sorted(set(tokenize(query)))
+        weights = np.zeros((len(self.entries), max(len(tokens), 1)))
+        total = max(len(self.entries), 1)
+        for column, token in enumerate(tokens):
+            name_hits = self._name_postings.get(token)
+            text_hits = self._text_postings.get(token)
+            hits = (0 if name_hits is None else len(name_hits)) + (0 if text_hits is None else len(text_hits))
+            if not hits:
+                continue
+            idf = math.log(1 + total / hits)
+            if name_hits is not None:
+                weights[name_hits, column] = NAME_WEIGHT * idf
+            if text_hits is not None:
+                weights[text_hits, column] = idf
+        return weights
+
+    def _intersecting(self, bbox: Tuple[float, float, float, float]):
+        """Indexes of the entries whose extent intersects the bbox"""
+        import numpy as np
+        import shapely
+
+        if self._tree is None:
+            return np.array([], dtype=int)
+        return self._indexed[self._tree.query(shapely.box(*bbox))]
+
+def describe(summary: Dict[str, Any], description: Optional[str] = None) -> str:
+    """One-line schema summary for the planner prompt"""
+    parts = []
+    if summary.get("geometry_type"):
+        parts.append(summary["geometry_type"])
+    if summary.get("feature_count") is not None:
+        parts.append(f"{summary['feature_count']} features")
+    if summary.get("bands"):
+        parts.append(f"{summary['bands']} band {summary.get('dtype', '')}".strip())
+        parts.append(f"{summary['width']}x{summary['height']} px")
+    if summary.get("crs"):
+        parts.append(summary["crs"])
+    if summary.get("bounds"):
+        parts.append("bbox " + ",".join(f"{value:.2f}" for value in summary["bounds"]))
+    columns = summary.get("columns") or []
+    if columns:
+        listed = ", ".join(columns[:SUMMARY_COLUMNS])
+        more = len(columns) - SUMMARY_COLUMNS
+        parts.append(f"columns: {listed}" + (f" (+{more} more)" if more > 0 else ""))
+    if description:
+        parts.append(description)
+    return "; ".join(parts) if parts else "summary pending"
+
+def summarize_dataset(file_path: str, data_type: str) -> Dict[str, Any]:
+    """Read a dataset's extent and schema without loading its features"""
+    from backend.utils.geospatial import get_transformer, WGS84
+
+    if data_type == "raster":
+        import rasterio
+        with rasterio.open(file_path) as src:
+            crs = src.crs.to_string() if src.crs else None
+            bounds = tuple(src.bounds)
+            summary = {"bands": src.count, "dtype": src.dtypes[0], "width": src.width, "height": src.height}
+    else:
+        import fiona
+        with fiona.open(file_path) as src:
+            crs = src.crs.to_string() if src.crs else None
+            bounds = tuple(src.bounds)
+            summary = {
+                "geometry_type": src.schema.get("geometry"),
+                "feature_count": len(src),
+                "columns": list(src.schema.get("properties", {}))
+            }
+
+    summary["crs"] = crs
+    if crs and all(math.isfinite(value) for value in bounds):
+        if crs != WGS84:
+            bounds = get_transformer(crs, WGS84).transform_bounds(*bounds)
+        summary["bounds"] = [round(value, 6) for value in bounds]
+    return summary
+
+def store_dataset_summary(item) -> Dict[str, Any]:
+    """Summarize a GeospatialData row into its metadata; the caller commits"""
+    try:
+        summary = summarize_dataset(item.file_path, item.data_type)
+    except Exception as e:
+        logger.warning("Could not summarize dataset %s: %s", item.id, e)
+        return {}
+    item.metadata_ = {**(item.metadata_ or {}), "summary": summary}
+    return summary
+
+_catalog: Optional[DatasetCatalog] = None
+_catalog_version: Optional[Tuple[Any, ...]] = None
+_catalog_loaded_at = 0.0
+_catalog_lock = threading.Lock()
+
+def get_catalog(db) -> DatasetCatalog:
+    """This process's catalog, rebuilt when datasets are added or it is older than the refresh interval"""
+    global _catalog, _catalog_version, _catalog_loaded_at
+    from sqlalchemy import func
+    from backend.models.database import GeospatialData
+
+    version = tuple(db.query(func.count(GeospatialData.id), func.max(GeospatialData.id)).one())
+    with _catalog_lock:
+        expired = time.monotonic() - _catalog_loaded_at > Config.CATALOG_REFRESH_SECONDS
+        if _catalog is None or version != _catalog_version or expired:
+            started = time.perf_counter()
+            _catalog = DatasetCatalog.from_db(db)
+            _catalog_version, _catalog_loaded_at = version, time.monotonic()
+            logger.info("Loaded dataset catalog of %d entries in %.0f ms", len(_catalog), (time.perf_counter() - started) * 1000)
+        return _catalog
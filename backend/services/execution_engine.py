@@ -2,12 +2,17 @@ import subprocess
 import tempfile
 import os
 import json
+import logging
 import sys
-from typing import Dict, Any, List
-import geopandas as gpd
-import pandas as pd
-from shapely.geometry import Point, LineString, Polygon
-import json
+import time
+from typing import Dict, Any, List, Optional
+from backend.config import Config
+from backend.services.dataset_cache import DatasetCache, CachedDatasets
+from backend.services.result_cache import ResultCache
+from backend.services.profiler import ExecutionProfile, GENERATED_FILENAME
+from backend.services import metrics
+
+logger = logging.getLogger(__name__)
 
 class ExecutionEngine:
     def __init__(self):
@@ -15,41 +20,114 @@ class ExecutionEngine:
             'geopandas', 'pandas', 'shapely', 'rasterio', 'numpy',
             'matplotlib', 'seaborn', 'json', 'os', 'tempfile'
         }
+        self.dataset_cache = DatasetCache()
+        self.result_cache = ResultCache(dataset_cache=self.dataset_cache) if Config.RESULT_CACHE_ENABLED else None
     
-    def execute_code(self, code: str, input_data: Dict[str, Any], dependencies: List[str]) -> Dict[str, Any]:
+    def execute_code(self, code: str, input_data: Dict[str, Any], dependencies: List[str],
+                     profile: bool = False) -> Dict[str, Any]:
         """Execute geospatial processing code in a controlled environment"""
         
         # Validate imports
         if not self._validate_imports(code):
             return {"success": False, "error": "Unauthorized imports detected"}
         
+        # Reuse the stored result when the same code already ran on the same data;
+        # a profiled run always executes so there is something to profile
+        cache_key = self._result_cache_key(code, input_data)
+        if cache_key and not profile:
+            with metrics.span("result_cache"):
+                cached = self.result_cache.get(cache_key)
+            if cached:
+                execution_info = dict(cached["execution_info"])
+                execution_info["dataset_cache"] = self.dataset_cache.stats()
+                execution_info["result_cache"] = self._cache_provenance(True, cache_key, cached["stored_at"])
+                return {"success": True, "result": cached["result"], "execution_info": execution_info}
+        
         # Create execution environment
         exec_globals = self._create_execution_environment()
-        exec_locals = {"input_data": input_data}
+        exec_locals = {"input_data": self._resolve_datasets(input_data)}
+        profiler = ExecutionProfile() if profile else None
+        layers = len(input_data.get("datasets") or {})
         
         try:
             # Execute the code
-            exec(code, exec_globals, exec_locals)
+            compiled = compile(code, GENERATED_FILENAME, "exec")
+            with metrics.span("execution"):
+                if profiler:
+                    with profiler.run():
+                        exec(compiled, exec_globals, exec_locals)
+                else:
+                    exec(compiled, exec_globals, exec_locals)
             
             # Extract result
             result = exec_locals.get('result')
             if result is None:
-                return {"success": False, "error": "Code did not produce a 'result' variable"}
+                return self._failure("Code did not produce a 'result' variable", profiler, layers)
             
             # Serialize result for JSON transport
-            serialized_result = self._serialize_result(result)
+            with metrics.span("serialization"):
+                serialized_result = self._serialize_result(result)
+            execution_info = {
+                "variables": list(exec_locals.keys()),
+                "result_type": type(result).__name__
+            }
+            
+            stored_at = None
+            if cache_key:
+                dataset_ids = [ref["dataset_id"] for ref in (input_data.get("datasets") or {}).values()]
+                self.result_cache.put(cache_key, serialized_result, execution_info, dataset_ids)
+                stored_at = time.time()
+            
+            execution_info["dataset_cache"] = self.dataset_cache.stats()
+            if cache_key:
+                execution_info["result_cache"] = self._cache_provenance(False, cache_key, stored_at)
+            if profiler:
+                execution_info["profile"] = profiler.summary(layers=layers)
             
             return {
                 "success": True,
                 "result": serialized_result,
-                "execution_info": {
-                    "variables": list(exec_locals.keys()),
-                    "result_type": type(result).__name__
-                }
+                "execution_info": execution_info
             }
             
         except Exception as e:
-            return {"success": False, "error": f"Execution failed: {str(e)}"}
+            return self._failure(f"Execution failed: {str(e)}", profiler, layers)
+    
+    def _failure(self, error: str, profiler: Optional[ExecutionProfile], layers: int) -> Dict[str, Any]:
+        """Error result, carrying the profile when a profiled run failed"""
+        failure = {"success": False, "error": error}
+        if profiler and profiler.stats is not None:
+            failure["execution_info"] = {"profile": profiler.summary(layers=layers)}
+        return failure
+    
+    def _result_cache_key(self, code: str, input_data: Dict[str, Any]) -> Optional[str]:
+        """Compute the result cache key, or None when caching is off or not possible"""
+        if not self.result_cache:
+            return None
+        try:
+            return self.result_cache.make_key(code, input_data)
+        except (OSError, KeyError) as e:
+            logger.warning("Skipping result cache: %s", e)
+            return None
+    
+    def _cache_provenance(self, hit: bool, key: str, stored_at: Optional[float]) -> Dict[str, Any]:
+        """Describe where a result came from, with the process-wide hit rate"""
+        return {
+            "hit": hit,
+            "key": key,
+            "stored_at": stored_at,
+            **self.result_cache.stats()
+        }
+    
+    def _resolve_datasets(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Expose dataset references in input_data["datasets"] as cached layers"""
+        references = input_data.get("datasets")
+        if not references:
+            return input_data
+        
+        resolved = dict(input_data)
+        resolved["datasets"] = CachedDatasets(references, self.dataset_cache)
+        return resolved
     
     def _validate_imports(self, code: str) -> bool:
         """Validate that code only uses allowed imports"""
@@ -76,6 +154,7 @@ class ExecutionEngine:
         import numpy as np
         from shapely.geometry import Point, LineString, Polygon, MultiPoint, MultiLineString, MultiPolygon
         from shapely.ops import unary_union, transform
+        from backend.utils.geospatial import local_crs, reproject, to_local_crs
         import json
         import tempfile
         import os
@@ -99,6 +178,11 @@ class ExecutionEngine:
             'unary_union': unary_union,
             'transform': transform,
             
+            # CRS helpers with cached transformers
+            'local_crs': local_crs,
+            'reproject': reproject,
+            'to_local_crs': to_local_crs,
+            
             # Utilities
             'json': json,
             'tempfile': tempfile,
@@ -128,6 +212,9 @@ class ExecutionEngine:
     
     def _serialize_result(self, result: Any) -> Any:
         """Serialize geospatial results for JSON transport"""
+        import geopandas as gpd
+        import pandas as pd
+        
         if isinstance(result, gpd.GeoDataFrame):
             return {
                 "type": "GeoDataFrame",
@@ -1,18 +1,51 @@
-import redis
 import json
-from typing import Dict, Any, Optional
-from celery import Celery
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from celery import Celery, chain, signals
 from backend.config import Config
+from backend.services import metrics
+# Imported before the worker pool forks, so its task run-time counters are shared
+from backend.services import autoscaler  # noqa: F401
 
-# Initialize Redis connection
-redis_client = redis.from_url(Config.REDIS_URL)
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+def get_redis_client():
+    """Create the shared Redis client on first use rather than at import"""
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.from_url(Config.REDIS_URL)
+    return _redis_client
 
 # Initialize Celery
 celery_app = Celery('geospatial_tasks', broker=Config.REDIS_URL)
 
+# LLM and retrieval stages wait on the network and go to a high-concurrency I/O pool;
+# executing generated code and reading datasets go to a pool sized to the cores
+celery_app.conf.update(
+    task_routes={
+        "backend.services.job_queue.plan_job": {"queue": Config.IO_QUEUE},
+        "backend.services.job_queue.generate_job_code": {"queue": Config.IO_QUEUE},
+        "backend.services.job_queue.execute_job": {"queue": Config.CPU_QUEUE},
+        "backend.services.job_queue.summarize_dataset": {"queue": Config.CPU_QUEUE},
+    },
+    # Stage tasks are long; don't let one worker hoard messages other workers could start
+    worker_prefetch_multiplier=1,
+    worker_autoscaler="backend.services.autoscaler:QueueDepthAutoscaler",
+)
+
+@signals.worker_init.connect
+def start_worker_metrics_server(**kwargs):
+    """Expose the worker's Prometheus metrics on a local port"""
+    metrics.start_metrics_server(Config.WORKER_METRICS_PORT)
+
 class JobQueue:
     def __init__(self):
-        self.redis_client = redis_client
+        self.redis_client = get_redis_client()
     
     def enqueue_job(self, job_id: str, job_data: Dict[str, Any]) -> bool:
         """Add a job to the queue"""
@@ -23,7 +56,7 @@ class JobQueue:
             }))
             return True
         except Exception as e:
-            print(f"Failed to enqueue job: {e}")
+            logger.error("Failed to enqueue job: %s", e)
             return False
     
     def dequeue_job(self, timeout: int = 10) -> Optional[Dict[str, Any]]:
@@ -34,7 +67,7 @@ class JobQueue:
                 return json.loads(result[1])
             return None
         except Exception as e:
-            print(f"Failed to dequeue job: {e}")
+            logger.error("Failed to dequeue job: %s", e)
             return None
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -45,7 +78,7 @@ class JobQueue:
                 return json.loads(status)
             return None
         except Exception as e:
-            print(f"Failed to get job status: {e}")
+            logger.error("Failed to get job status: %s", e)
             return None
     
     def update_job_status(self, job_id: str, status: Dict[str, Any]) -> bool:
@@ -58,78 +91,242 @@ class JobQueue:
             )
             return True
         except Exception as e:
-            print(f"Failed to update job status: {e}")
+            logger.error("Failed to update job status: %s", e)
             return False
 
-# Celery task for processing geospatial jobs
+def run_blocking(func, *args):
+    """Call func in a native thread when running on a gevent worker.
+    
+    Catalog rebuilds (about a second at 100k datasets) and fiona header reads never
+    yield to the gevent loop; in a native thread the loop keeps serving the other
+    greenlets meanwhile. On other pools func is simply called.
+    """
+    try:
+        from gevent import get_hub, monkey
+    except ImportError:
+        return func(*args)
+    if not monkey.is_module_patched("socket"):
+        return func(*args)
+    return get_hub().threadpool.apply(func, args)
+
+def available_datasets(db, query: str, bbox: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """Catalog matches for the planner prompt, summarizing any not summarized yet"""
+    from backend.models.database import GeospatialData
+    from backend.services.dataset_catalog import get_catalog, store_dataset_summary
+    
+    catalog = get_catalog(db)
+    entries = catalog.search(query, bbox)
+    pending = {entry["id"]: entry for entry in entries if not entry["summary"]}
+    if pending:
+        for item in db.query(GeospatialData).filter(GeospatialData.id.in_(list(pending))):
+            pending[item.id]["summary"] = store_dataset_summary(item)
+    return catalog.prompt_entries(entries)
+
+def build_input_data(db, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the datasets referenced by the plan steps as dataset cache references"""
+    from backend.models.database import GeospatialData
+    
+    references = {}
+    for step in plan.get("steps", []):
+        parameters = step.get("parameters") or {}
+        if "dataset_id" in parameters:
+            item = db.query(GeospatialData).filter(GeospatialData.id == parameters["dataset_id"]).first()
+        elif "file_path" in parameters:
+            item = db.query(GeospatialData).filter(GeospatialData.file_path == parameters["file_path"]).first()
+        else:
+            continue
+        
+        if item:
+            references[item.name] = {
+                "dataset_id": item.id,
+                "file_path": item.file_path,
+                "data_type": item.data_type
+            }
+    
+    return {"datasets": references} if references else {}
+
 @celery_app.task
-def process_geospatial_job(job_id: str):
-    """Process a geospatial analysis job"""
-    from backend.agents.planner import PlannerAgent
-    from backend.agents.coder import CoderAgent
-    from backend.agents.validator import ValidatorAgent
+def summarize_dataset(data_id: int):
+    """Compute an uploaded dataset's catalog summary off the request path"""
+    from backend.models.database import SessionLocal, GeospatialData
+    from backend.services.dataset_catalog import store_dataset_summary
+    
+    db = SessionLocal()
+    try:
+        item = db.query(GeospatialData).filter(GeospatialData.id == data_id).first()
+        if item and not (item.metadata_ or {}).get("summary"):
+            store_dataset_summary(item)
+            db.commit()
+    finally:
+        db.close()
+
+@contextmanager
+def job_stage(job_id: str, enqueued_at: Optional[float] = None):
+    """Database session, job row and timing trace for one task of the pipeline.
+    
+    Yields (db, job, job_queue), where job is None if it does not exist. An exception
+    marks the job failed. The stage's trace is merged into job.metrics and the job row
+    is committed when the block exits.
+    """
     from backend.models.database import SessionLocal, GeospatialJob
     
     db = SessionLocal()
     job_queue = JobQueue()
+    job = None
     
-    try:
-        # Get job from database
-        job = db.query(GeospatialJob).filter(GeospatialJob.id == job_id).first()
+    with metrics.job_trace(job_id) as trace:
+        if enqueued_at is not None:
+            metrics.record_span("queue_wait", max(time.time() - enqueued_at, 0.0))
+        
+        try:
+            with metrics.span("db"):
+                job = db.query(GeospatialJob).filter(GeospatialJob.id == job_id).first()
+            yield db, job, job_queue
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            if job is not None:
+                job.status = "failed"
+                job.error_message = str(e)
+            job_queue.update_job_status(job_id, {"status": "failed", "error": str(e)})
+        finally:
+            try:
+                if job is not None:
+                    if job.status in ("completed", "failed"):
+                        metrics.record_job(job.status)
+                    if trace is not None:
+                        job.metrics = metrics.merge_summaries(job.metrics, trace.summary())
+                    with metrics.span("db"):
+                        db.commit()
+            finally:
+                db.close()
+
+def submit_job(job_id: str, profile: bool = False, bbox: Optional[List[float]] = None):
+    """Start processing a job, as stage tasks on the I/O and CPU queues or as one task"""
+    if Config.PIPELINE_MODE == "single":
+        return process_geospatial_job.delay(job_id, enqueued_at=time.time(), profile=profile, bbox=bbox)
+    
+    context = {"job_id": job_id, "profile": profile, "bbox": bbox, "enqueued_at": time.time()}
+    return chain(plan_job.s(context), generate_job_code.s(), execute_job.s()).apply_async()
+
+# Celery task for processing geospatial jobs
+@celery_app.task
+def process_geospatial_job(job_id: str, enqueued_at: Optional[float] = None, profile: bool = False,
+                           bbox: Optional[List[float]] = None):
+    """Process a geospatial analysis job end to end in one task"""
+    with job_stage(job_id, enqueued_at) as (db, job, job_queue):
         if not job:
             return {"error": "Job not found"}
-        
-        # Update status
-        job_queue.update_job_status(job_id, {"status": "processing", "stage": "planning"})
-        
-        # Step 1: Create plan
-        planner = PlannerAgent()
-        plan = planner.create_plan(job.user_query, [])  # Add available data
-        
-        if "error" in plan:
-            job.status = "failed"
-            job.error_message = plan["error"]
-            db.commit()
-            return plan
-        
-        job.plan = plan
-        job_queue.update_job_status(job_id, {"status": "processing", "stage": "coding"})
-        
-        # Step 2: Generate code
-        coder = CoderAgent()
-        code_result = coder.generate_code(plan)
-        
-        if "error" in code_result:
-            job.status = "failed"
-            job.error_message = code_result["error"]
-            db.commit()
-            return code_result
-        
-        job.code = code_result["code"]
-        job_queue.update_job_status(job_id, {"status": "processing", "stage": "validation"})
-        
-        # Step 3: Validate and execute
-        validator = ValidatorAgent()
-        validation_result = validator.validate_and_execute(code_result, {})
-        
-        if validation_result["success"]:
-            job.status = "completed"
-            job.result = validation_result["result"]
-            job.is_completed = True
-            job_queue.update_job_status(job_id, {"status": "completed", "result": validation_result["result"]})
-        else:
-            job.status = "failed"
-            job.error_message = validation_result["error"]
-            job_queue.update_job_status(job_id, {"status": "failed", "error": validation_result["error"]})
-        
-        db.commit()
-        return validation_result
-        
-    except Exception as e:
+        return run_pipeline(db, job, job_queue, profile=profile, bbox=bbox)
+    return {"error": "Job failed"}
+
+# Stage tasks of the split pipeline. Each passes a small context to the next and
+# returns None to stop the chain once the job has failed.
+@celery_app.task
+def plan_job(context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Pick the relevant datasets and ask the planner for a plan (I/O queue)"""
+    with job_stage(context["job_id"], context["enqueued_at"]) as (db, job, job_queue):
+        if job and run_planning(db, job, job_queue, context.get("bbox")):
+            return dict(context, enqueued_at=time.time())
+    return None
+
+@celery_app.task
+def generate_job_code(context: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Compile or generate the code for the job's plan (I/O queue)"""
+    if context is None:
+        return None
+    with job_stage(context["job_id"], context["enqueued_at"]) as (db, job, job_queue):
+        if job and run_coding(db, job, job_queue):
+            return dict(context, enqueued_at=time.time())
+    return None
+
+@celery_app.task
+def execute_job(context: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Validate and execute the job's code (CPU queue)"""
+    if context is None:
+        return None
+    with job_stage(context["job_id"], context["enqueued_at"]) as (db, job, job_queue):
+        if job:
+            run_execution(db, job, job_queue, profile=context.get("profile", False))
+    return None
+
+def run_pipeline(db, job, job_queue: JobQueue, profile: bool = False,
+                 bbox: Optional[List[float]] = None) -> Dict[str, Any]:
+    """Plan, generate, validate and execute a job; the caller commits the job row"""
+    if not run_planning(db, job, job_queue, bbox):
+        return {"error": job.error_message}
+    if not run_coding(db, job, job_queue):
+        return {"error": job.error_message}
+    return run_execution(db, job, job_queue, profile=profile)
+
+def run_planning(db, job, job_queue: JobQueue, bbox: Optional[List[float]] = None) -> bool:
+    """Step 1: create a plan from the datasets relevant to the query"""
+    from backend.agents.planner import PlannerAgent
+    
+    job_queue.update_job_status(str(job.id), {"status": "processing", "stage": "planning"})
+    
+    with metrics.span("catalog"):
+        available_data = run_blocking(available_datasets, db, job.user_query, bbox)
+    planner = PlannerAgent()
+    plan = planner.create_plan(job.user_query, available_data)
+    
+    if "error" in plan:
         job.status = "failed"
-        job.error_message = str(e)
-        db.commit()
-        job_queue.update_job_status(job_id, {"status": "failed", "error": str(e)})
-        return {"error": str(e)}
-    finally:
-        db.close()
\ No newline at end of file
+        job.error_message = plan["error"]
+        return False
+    
+    job.plan = plan
+    return True
+
+def run_coding(db, job, job_queue: JobQueue) -> bool:
+    """Step 2: generate code for the plan"""
+    from backend.agents.coder import CoderAgent
+    
+    job_queue.update_job_status(str(job.id), {"status": "processing", "stage": "coding"})
+    
+    with metrics.span("db"):
+        input_data = build_input_data(db, job.plan)
+    
+    coder = CoderAgent()
+    code_result = coder.generate_code(job.plan, input_data.get("datasets"))
+    
+    if "error" in code_result:
+        job.status = "failed"
+        job.error_message = code_result["error"]
+        return False
+    
+    job.code = code_result["code"]
+    return True
+
+def run_execution(db, job, job_queue: JobQueue, profile: bool = False) -> Dict[str, Any]:
+    """Step 3: validate and execute the job's code"""
+    from backend.agents.validator import ValidatorAgent
+    
+    job_id = str(job.id)
+    job_queue.update_job_status(job_id, {"status": "processing", "stage": "validation"})
+    
+    with metrics.span("db"):
+        input_data = build_input_data(db, job.plan)
+    
+    validator = ValidatorAgent()
+    validation_result = validator.validate_and_execute({"code": job.code}, input_data, profile=profile)
+    
+    if profile and "execution_info" in validation_result:
+        job.profile = validation_result["execution_info"].get("profile")
+    
+    if validation_result["success"]:
+        job.status = "completed"
+        job.result = validation_result["result"]
+        job.is_completed = True
+        if metrics.ENABLED:
+            metrics.record_result_size(len(json.dumps(job.result, default=str)))
+        job_queue.update_job_status(job_id, {
+            "status": "completed",
+            "result": validation_result["result"],
+            "result_cache": validation_result["execution_info"].get("result_cache")
+        })
+    else:
+        job.status = "failed"
+        job.error_message = validation_result["error"]
+        job_queue.update_job_status(job_id, {"status": "failed", "error": validation_result["error"]})
+    
+    return validation_result
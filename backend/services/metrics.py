@@ -0,0 +1,248 @@
+import contextvars
+import logging
+import os
+import resource
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Optional, Tuple
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+ENABLED = Config.METRICS_ENABLED
+
+try:
+    import prometheus_client
+except ImportError:  # Metrics are still stored per job without the exporter
+    prometheus_client = None
+
+# Shared no-op returned by span() when metrics are disabled
+_NOOP = nullcontext()
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("job_trace", default=None)
+
+if ENABLED and prometheus_client is not None:
+    STAGE_SECONDS = prometheus_client.Histogram(
+        "geospatial_stage_seconds", "Wall time spent in each job pipeline stage", ["stage"],
+        buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    )
+    LLM_TOKENS = prometheus_client.Counter(
+        "geospatial_llm_tokens", "LLM tokens used per agent", ["agent", "kind"]
+    )
+    RESULT_BYTES = prometheus_client.Histogram(
+        "geospatial_result_bytes", "Serialized job result size",
+        buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 5e7, 1e8)
+    )
+    MAX_RSS_BYTES = prometheus_client.Gauge(
+        "geospatial_process_max_rss_bytes", "Peak resident memory of the process", multiprocess_mode="max"
+    )
+    JOBS = prometheus_client.Counter("geospatial_jobs", "Processed jobs by final status", ["status"])
+    CODE_SOURCE = prometheus_client.Counter(
+        "geospatial_code_source", "Jobs whose code came from a template or the coder LLM", ["source"]
+    )
+else:
+    STAGE_SECONDS = LLM_TOKENS = RESULT_BYTES = MAX_RSS_BYTES = JOBS = CODE_SOURCE = None
+
+
+class JobTrace:
+    """Timing spans, token counts and sizes collected while processing one job"""
+
+    def __init__(self, job_id: Any):
+        self.job_id = job_id
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.values: Dict[str, float] = {}
+        self.labels: Dict[str, str] = {}
+        self.peak_rss = rss_bytes()
+
+    def add_span(self, name: str, seconds: float, start: Optional[float] = None, rss_start: Optional[int] = None):
+        span = {
+            "name": name,
+            "start_ms": round(((start or time.perf_counter() - seconds) - self.started) * 1000, 3),
+            "duration_ms": round(seconds * 1000, 3)
+        }
+        rss = rss_bytes()
+        if rss is not None:
+            # Resident memory when the stage ended, and how much it grew during it
+            span["rss_mb"] = round(rss / 1024 ** 2, 1)
+            if rss_start is not None:
+                span["rss_delta_mb"] = round((rss - rss_start) / 1024 ** 2, 1)
+            self.peak_rss = max(self.peak_rss or 0, rss, rss_start or 0)
+        self.spans.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable record stored on the job"""
+        stage_totals: Dict[str, float] = {}
+        for span in self.spans:
+            stage_totals[span["name"]] = round(stage_totals.get(span["name"], 0.0) + span["duration_ms"], 3)
+        return {
+            "started_at": self.started_at,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages_ms": stage_totals,
+            "spans": self.spans,
+            "tokens": self.tokens,
+            "values": self.values,
+            "labels": self.labels,
+            # Highest RSS sampled at this job's span boundaries, and the worker process's
+            # lifetime high-water mark, which earlier, larger jobs may have set
+            "peak_rss_mb": round(self.peak_rss / 1024 ** 2, 1) if self.peak_rss is not None else None,
+            "process_max_rss_mb": round(max_rss_bytes() / 1024 ** 2, 1)
+        }
+
+
+def merge_summaries(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the traces of pipeline stages that ran as separate tasks into one job record"""
+    if not previous or "started_at" not in previous:
+        return current
+    offset_ms = (current["started_at"] - previous["started_at"]) * 1000
+    stage_totals = dict(previous["stages_ms"])
+    for name, duration in current["stages_ms"].items():
+        stage_totals[name] = round(stage_totals.get(name, 0.0) + duration, 3)
+    return {
+        "started_at": previous["started_at"],
+        "total_ms": round(offset_ms + current["total_ms"], 3),
+        "stages_ms": stage_totals,
+        "spans": previous["spans"] + [
+            dict(span, start_ms=round(span["start_ms"] + offset_ms, 3)) for span in current["spans"]
+        ],
+        "tokens": {**previous["tokens"], **current["tokens"]},
+        "values": {**previous["values"], **current["values"]},
+        "labels": {**previous.get("labels", {}), **current.get("labels", {})},
+        "peak_rss_mb": max((value for value in (previous.get("peak_rss_mb"), current["peak_rss_mb"]) if value is not None),
+                           default=None),
+        "process_max_rss_mb": max(previous.get("process_max_rss_mb", 0), current["process_max_rss_mb"])
+    }
+
+
+@contextmanager
+def job_trace(job_id: Any):
+    """Collect the spans recorded while processing a job; yields None when disabled"""
+    if not ENABLED:
+        yield None
+        return
+
+    trace = JobTrace(job_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if MAX_RSS_BYTES is not None:
+            MAX_RSS_BYTES.set(max_rss_bytes())
+
+
+def span(name: str):
+    """Time a pipeline stage into the current job trace and Prometheus"""
+    if not ENABLED:
+        return _NOOP
+    return _timed_span(name)
+
+
+@contextmanager
+def _timed_span(name: str):
+    rss_start = rss_bytes() if _current_trace.get() is not None else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start, start, rss_start)
+
+
+def record_span(name: str, seconds: float, start: Optional[float] = None, rss_start: Optional[int] = None):
+    """Record a stage duration measured elsewhere, e.g. time spent queued"""
+    if not ENABLED:
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, seconds, start, rss_start)
+    if STAGE_SECONDS is not None:
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+
+def record_tokens(agent: str, usage: Any):
+    """Record prompt/completion token counts from an LLM response's usage block"""
+    if not ENABLED or usage is None:
+        return
+    counts = {}
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)
+        if value is not None:
+            counts[kind] = int(value)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.tokens[agent] = counts
+    if LLM_TOKENS is not None:
+        for kind, value in counts.items():
+            if kind != "total_tokens":
+                LLM_TOKENS.labels(agent=agent, kind=kind).inc(value)
+
+
+def record_result_size(num_bytes: int):
+    if not ENABLED:
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.values["result_bytes"] = num_bytes
+    if RESULT_BYTES is not None:
+        RESULT_BYTES.observe(num_bytes)
+
+
+def record_code_source(source: str):
+    """Record whether a job's code came from a template or the coder LLM"""
+    if not ENABLED:
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.labels["code_source"] = source
+    if CODE_SOURCE is not None:
+        CODE_SOURCE.labels(source=source).inc()
+
+
+def record_job(status: str):
+    if JOBS is not None:
+        JOBS.labels(status=status).inc()
+
+
+def max_rss_bytes() -> int:
+    """Peak resident memory over the whole process lifetime, not per job"""
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident memory of the process; None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Celery prefork children each write their own files; aggregate them
+        from prometheus_client import multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def export() -> Tuple[bytes, str]:
+    """Prometheus text exposition of this process's metrics"""
+    if not ENABLED or prometheus_client is None:
+        return b"", "text/plain"
+    return prometheus_client.generate_latest(_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    """Serve /metrics from a worker process on a local port"""
+    if not ENABLED or prometheus_client is None:
+        return
+    try:
+        prometheus_client.start_http_server(port, registry=_registry())
+    except OSError as e:
+        logger.warning("Metrics server not started on port %s: %s", port, e)
@@ -0,0 +1,150 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from backend.config import Config
+
+# Filename generated code is compiled under, so its frames can be told apart
+GENERATED_FILENAME = "<generated>"
+
+# tracemalloc is process-wide; only one profiled execution traces allocations at a time.
+# With a threaded worker pool, jobs running alongside a profiled one are traced (and
+# slowed) too, and count towards its peak; the default prefork pool keeps them apart.
+_tracemalloc_lock = threading.Lock()
+
+# Functions that mark row-at-a-time loops over a DataFrame
+ROW_LOOP_FUNCTIONS = {"iterrows", "itertuples", "apply"}
+
+# Functions that reproject a layer
+REPROJECT_FUNCTIONS = {"to_crs", "reproject", "to_local_crs"}
+
+class ExecutionProfile:
+    """Wall/CPU time, cProfile hot functions and tracemalloc peaks for one code execution"""
+
+    def __init__(self, top_n: Optional[int] = None, frames: Optional[int] = None):
+        self.top_n = top_n or Config.PROFILE_TOP_FUNCTIONS
+        self.frames = frames or Config.PROFILE_TRACEMALLOC_FRAMES
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.stats: Optional[pstats.Stats] = None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+
+    @contextmanager
+    def run(self):
+        """Profile the code executed inside the block on the current thread"""
+        profiler = cProfile.Profile()
+        with _tracemalloc_lock:
+            tracemalloc.start(self.frames)
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+            profiler.enable()
+            try:
+                yield self
+            finally:
+                profiler.disable()
+                self.wall_seconds = time.perf_counter() - wall_start
+                self.cpu_seconds = time.thread_time() - cpu_start
+                self.snapshot = tracemalloc.take_snapshot()
+                self.peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                # Kept when the profiled code raises too; failing runs are worth profiling
+                self.stats = pstats.Stats(profiler)
+
+    def summary(self, layers: int = 0) -> Dict[str, Any]:
+        """JSON-serializable record stored on the job; layers is the number of input datasets"""
+        functions = self._functions()
+        summary = {
+            "wall_ms": round(self.wall_seconds * 1000, 3),
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            "peak_allocated_mb": round(self.peak_bytes / 1024 ** 2, 3),
+            "hot_functions": sorted(functions, key=lambda f: f["cumulative_ms"], reverse=True)[:self.top_n],
+            "top_allocations": self._top_allocations(),
+            "findings": self._findings(functions, layers)
+        }
+        if self.frames > 1:
+            summary["allocations_by_line"] = self._allocations_by_line()
+        return summary
+
+    def _functions(self) -> List[Dict[str, Any]]:
+        if self.stats is None:
+            return []
+        functions = []
+        for (filename, line, name), (_, calls, total, cumulative, callers) in self.stats.stats.items():
+            if name == "<built-in method builtins.exec>":
+                continue  # the engine's own exec() call wraps everything
+            functions.append({
+                "function": name,
+                "location": f"{_short_path(filename)}:{line}",
+                "calls": calls,
+                "calls_from_code": sum(counts[1] for caller, counts in callers.items()
+                                       if caller[0] == GENERATED_FILENAME),
+                "self_ms": round(total * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3)
+            })
+        return functions
+
+    def _top_allocations(self) -> List[Dict[str, Any]]:
+        """Source lines holding the most memory at the end of the run"""
+        if self.snapshot is None:
+            return []
+        return [
+            {
+                "location": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "size_mb": round(stat.size / 1024 ** 2, 3),
+                "blocks": stat.count
+            }
+            for stat in self.snapshot.statistics("lineno")[:self.top_n]
+        ]
+
+    def _allocations_by_line(self) -> List[Dict[str, Any]]:
+        """Memory still held at the end, attributed to the generated line that allocated it"""
+        if self.snapshot is None:
+            return []
+        by_line: Dict[int, List[int]] = {}
+        for trace in self.snapshot.traces:
+            # Walk outwards from the allocation to the innermost generated-code frame
+            for frame in trace.traceback:
+                if frame.filename == GENERATED_FILENAME:
+                    totals = by_line.setdefault(frame.lineno, [0, 0])
+                    totals[0] += trace.size
+                    totals[1] += 1
+                    break
+        return [
+            {"line": line, "size_mb": round(size / 1024 ** 2, 3), "blocks": blocks}
+            for line, (size, blocks) in sorted(by_line.items(), key=lambda item: item[1][0], reverse=True)[:self.top_n]
+        ]
+
+    def _findings(self, functions: List[Dict[str, Any]], layers: int) -> List[str]:
+        """Known slow patterns in generated code, phrased as advice for the knowledge base"""
+        wall_ms = self.wall_seconds * 1000
+        findings = []
+        for function in functions:
+            if function["function"] in ROW_LOOP_FUNCTIONS and "pandas" in function["location"] \
+                    and function["cumulative_ms"] > 0.1 * wall_ms:
+                findings.append(
+                    f"Row-wise {function['function']} took {function['cumulative_ms']:.0f} ms of "
+                    f"{wall_ms:.0f} ms; use vectorized column or GeoSeries operations"
+                )
+
+        # Each input layer once, plus the result back to the input CRS
+        reprojections = sum(f["calls_from_code"] for f in functions if f["function"] in REPROJECT_FUNCTIONS)
+        if reprojections > layers + 1:
+            findings.append(f"Layers were reprojected {reprojections} times; reproject each layer once and reuse it")
+
+        geometry_calls = sum(f["calls_from_code"] for f in functions if "shapely" in f["location"])
+        if geometry_calls > 1000:
+            findings.append(
+                f"{geometry_calls} Python-level shapely calls; operate on whole GeoSeries instead of single geometries"
+            )
+        return findings
+
+def _short_path(filename: str) -> str:
+    """Trim interpreter and site-packages prefixes from a code location"""
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
@@ -0,0 +1,142 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from backend.config import Config
+from backend.services.dataset_cache import DatasetCache
+from backend.utils.disk_cache import atomic_write, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """Local artifact store of serialized execution results.
+
+    Entries are keyed by a hash of the normalized code, the non-dataset
+    input_data and the content hash of every referenced dataset, so recurring
+    jobs against unchanged data skip execution entirely. Each entry is also
+    indexed by dataset id so a changed ``GeospatialData`` row drops every
+    result computed from it.
+    """
+
+    _stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 dataset_cache: Optional[DatasetCache] = None):
+        self.cache_dir = cache_dir or Config.RESULT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.RESULT_CACHE_MAX_BYTES
+        self.dataset_cache = dataset_cache or DatasetCache()
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.index_dir = os.path.join(self.cache_dir, "by_dataset")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def make_key(self, code: str, input_data: Dict[str, Any]) -> str:
+        """Hash the normalized code together with its inputs and dataset versions"""
+        references = input_data.get("datasets") or {}
+        key_material = {
+            "code": self._normalize_code(code),
+            "input_data": {k: v for k, v in input_data.items() if k != "datasets"},
+            "datasets": {
+                name: {
+                    **reference,
+                    "content_hash": self.dataset_cache.content_hash(reference["file_path"])
+                }
+                for name, reference in references.items()
+            }
+        }
+        encoded = json.dumps(key_material, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a key, or None on a miss"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._record("misses")
+            return None
+
+        touch(entry_path)
+        self._record("hits")
+        return entry
+
+    def put(self, key: str, result: Any, execution_info: Dict[str, Any], dataset_ids: list) -> None:
+        """Store a successful result and index it under each dataset it read"""
+        entry = {
+            "key": key,
+            "result": result,
+            "execution_info": execution_info,
+            "dataset_ids": dataset_ids,
+            "stored_at": time.time()
+        }
+        try:
+            atomic_write(self._entry_path(key), json.dumps(entry, default=str).encode())
+            for data_id in dataset_ids:
+                marker = os.path.join(self.index_dir, str(data_id), key)
+                os.makedirs(os.path.dirname(marker), exist_ok=True)
+                open(marker, "w").close()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to store cached result %s: %s", key, e)
+            return
+
+        self._record("stores")
+        evicted = evict_lru(self.entries_dir, self.max_bytes, suffix=".json", keep=[self._entry_path(key)])
+        if evicted:
+            self._record("evictions", len(evicted))
+            self._remove_markers({os.path.basename(path)[:-len(".json")] for path in evicted})
+
+    def invalidate_dataset(self, data_id: Any) -> int:
+        """Drop every cached result computed from the given dataset"""
+        dataset_index = os.path.join(self.index_dir, str(data_id))
+        if not os.path.isdir(dataset_index):
+            return 0
+
+        removed = 0
+        for key in os.listdir(dataset_index):
+            for path in (self._entry_path(key), os.path.join(dataset_index, key)):
+                try:
+                    os.remove(path)
+                    removed += path.endswith(".json")
+                except OSError:
+                    pass
+
+        self._record("invalidations", removed)
+        return removed
+
+    def _remove_markers(self, keys: set) -> None:
+        """Drop the by-dataset index entries of evicted results"""
+        for dataset_index in os.listdir(self.index_dir):
+            for key in keys:
+                try:
+                    os.remove(os.path.join(self.index_dir, dataset_index, key))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for this worker process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _normalize_code(self, code: str) -> str:
+        """Hash the AST so formatting and comment changes still hit the cache"""
+        try:
+            normalized = ast.dump(ast.parse(code))
+        except SyntaxError:
+            normalized = code
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.entries_dir, f"{key}.json")
+
+    def _record(self, counter: str, count: int = 1):
+        with self._stats_lock:
+            self._stats[counter] += count
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+from backend.config import Config
+from backend.utils.disk_cache import atomic_write, directory_size, evict_lru, touch
+
+# Half the width of the Web Mercator world, in meters
+WEB_MERCATOR_EXTENT = 20037508.342789244
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+SCREEN_TILE_PIXELS = 256
+LAYER_NAME = "result"
+
+# Evictions trim the cache to this share of its limit, so the walk they take stays rare
+EVICT_TO_FRACTION = 0.9
+# How long the running cache size is trusted before it is re-read from disk, which
+# picks up the tiles other processes sharing the directory have written
+CACHE_SIZE_RESYNC_SECONDS = 300
+
+class TileService:
+    """Serves Mapbox Vector Tiles for completed job results.
+
+    Each result is reprojected to Web Mercator once and indexed with an
+    STRtree; the indexes of recently viewed jobs stay in memory. Encoded tiles
+    are written to an on-disk cache evicted LRU by bytes, so panning back over
+    a viewport never re-renders it. Job results are immutable once completed,
+    so cached tiles never need invalidating. The result is passed as a loader
+    and only read when a job's index has to be built.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_indexed_jobs: Optional[int] = None):
+        self.cache_dir = cache_dir or Config.TILE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.TILE_CACHE_MAX_BYTES
+        self.max_indexed_jobs = max_indexed_jobs or Config.TILE_INDEX_MAX_JOBS
+        self._indexes: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._cache_bytes: Optional[int] = None
+        self._cache_bytes_read_at = 0.0
+        self._cache_bytes_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_tile(self, job_id: Any, load_result: Callable[[], Dict[str, Any]], z: int, x: int, y: int) -> bytes:
+        """Return the encoded tile, rendering and caching it on a miss"""
+        cache_path = os.path.join(self.cache_dir, str(job_id), str(z), str(x), f"{y}.mvt")
+        try:
+            with open(cache_path, "rb") as f:
+                tile = f.read()
+            touch(cache_path)
+            return tile
+        except OSError:
+            pass
+
+        tile = self.render_tile(job_id, load_result, z, x, y)
+        atomic_write(cache_path, tile)
+        self._count_written(len(tile))
+        return tile
+
+    def _count_written(self, size: int):
+        """Add a new tile to the running cache size and evict once it passes the limit.
+
+        Walking the cache on every miss costs far more than rendering the tile, so the
+        size is read from disk only at first use, periodically and when evicting.
+        """
+        with self._cache_bytes_lock:
+            now = time.monotonic()
+            if self._cache_bytes is None or now - self._cache_bytes_read_at > CACHE_SIZE_RESYNC_SECONDS:
+                self._cache_bytes = directory_size(self.cache_dir, suffix=".mvt")
+                self._cache_bytes_read_at = now
+            else:
+                self._cache_bytes += size
+            if self._cache_bytes <= self.max_bytes:
+                return
+            target = int(self.max_bytes * EVICT_TO_FRACTION)
+            evict_lru(self.cache_dir, target, suffix=".mvt")
+            self._cache_bytes = target
+
+    def render_tile(self, job_id: Any, load_result: Callable[[], Dict[str, Any]], z: int, x: int, y: int) -> bytes:
+        """Clip, simplify and encode the features intersecting one tile"""
+        import mapbox_vector_tile
+        import numpy as np
+        import shapely
+
+        index = self._get_index(job_id, load_result)
+        bounds = tile_bounds(z, x, y)
+        tile_size = bounds[2] - bounds[0]
+        margin = tile_size / TILE_EXTENT * TILE_BUFFER
+        clip_box = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+        hits = index["tree"].query(shapely.box(*clip_box))
+        if len(hits) == 0:
+            return mapbox_vector_tile.encode([{"name": LAYER_NAME, "features": []}])
+
+        # Simplify to one screen pixel at this zoom, then clip to the buffered tile
+        geometries = shapely.simplify(index["geometries"][hits], tile_size / SCREEN_TILE_PIXELS, preserve_topology=True)
+        geometries = shapely.clip_by_rect(geometries, *clip_box)
+
+        # Quantize to integer tile coordinates and fix ring orientation here, vectorized,
+        # rather than letting the encoder transform and re-orient every feature in Python.
+        # normalize() makes exterior rings clockwise with y up; flipping y afterwards gives
+        # the MVT winding order (exterior clockwise in screen space, y down).
+        scale = TILE_EXTENT / tile_size
+        geometries = shapely.transform(
+            geometries,
+            lambda coords: np.column_stack([(coords[:, 0] - bounds[0]) * scale, (coords[:, 1] - bounds[1]) * scale])
+        )
+        geometries = shapely.normalize(shapely.set_precision(geometries, 1.0))
+        geometries = shapely.transform(
+            geometries, lambda coords: np.column_stack([coords[:, 0], TILE_EXTENT - coords[:, 1]])
+        )
+        keep = ~shapely.is_empty(geometries) & ~shapely.is_missing(geometries)
+
+        features = [
+            {"geometry": geometry, "properties": index["properties"][row]}
+            for row, geometry in zip(hits[keep], geometries[keep])
+        ]
+        return mapbox_vector_tile.encode(
+            [{"name": LAYER_NAME, "features": features}],
+            default_options={"extents": TILE_EXTENT, "y_coord_down": True, "check_winding_order": False}
+        )
+
+    def tilejson(self, job_id: Any, load_result: Callable[[], Dict[str, Any]], tiles_url: str) -> Dict[str, Any]:
+        """TileJSON description of a job's tiles, including WGS84 bounds"""
+        index = self._get_index(job_id, load_result)
+        return {
+            "tilejson": "3.0.0",
+            "tiles": [tiles_url],
+            "vector_layers": [{"id": LAYER_NAME, "fields": index["fields"]}],
+            "bounds": index["bounds"],
+            "minzoom": 0,
+            "maxzoom": Config.TILE_MAX_ZOOM
+        }
+
+    def _get_index(self, job_id: Any, load_result: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            if job_id in self._indexes:
+                self._indexes.move_to_end(job_id)
+                return self._indexes[job_id]
+
+        index = self._build_index(load_result())
+
+        with self._lock:
+            self._indexes[job_id] = index
+            while len(self._indexes) > self.max_indexed_jobs:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _build_index(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        import geopandas as gpd
+        import numpy as np
+        import shapely
+        from backend.utils.geospatial import get_transformer, reproject
+
+        data = result["data"]
+        features = json.loads(data)["features"] if isinstance(data, str) else data["features"]
+        gdf = gpd.GeoDataFrame.from_features(features, crs=result.get("crs") or "EPSG:4326")
+        gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty]
+
+        bounds = list(get_transformer(gdf.crs, "EPSG:4326").transform_bounds(*gdf.total_bounds)) if len(gdf) else None
+        mercator = reproject(gdf, "EPSG:3857")
+        geometries = np.asarray(mercator.geometry.values)
+        attributes = mercator.drop(columns=[mercator.geometry.name])
+        # to_dict("records") returns no rows at all when there are no columns
+        records = attributes.to_dict("records") if len(attributes.columns) else [{}] * len(attributes)
+
+        return {
+            "tree": shapely.STRtree(geometries),
+            "geometries": geometries,
+            "properties": [_tile_properties(row) for row in records],
+            "fields": {column: str(dtype) for column, dtype in attributes.dtypes.items()},
+            "bounds": bounds
+        }
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Web Mercator bounds (minx, miny, maxx, maxy) of an XYZ tile"""
+    size = 2 * WEB_MERCATOR_EXTENT / (1 << z)
+    minx = -WEB_MERCATOR_EXTENT + x * size
+    maxy = WEB_MERCATOR_EXTENT - y * size
+    return (minx, maxy - size, minx + size, maxy)
+
+
+def _tile_properties(row: Dict[str, Any]) -> Dict[str, Any]:
+    """MVT attributes must be scalar; drop nulls and stringify everything else"""
+    properties = {}
+    for key, value in row.items():
+        if value is None or (isinstance(value, float) and value != value):
+            continue
+        if isinstance(value, (bool, int, float, str)):
+            properties[key] = value
+            continue
+        try:
+            # numpy scalars
+            properties[key] = value.item()
+        except (AttributeError, ValueError):
+            properties[key] = str(value)
+    return properties
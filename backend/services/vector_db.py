@@ -1,13 +1,19 @@
+import logging
 import chromadb
 from typing import List, Dict, Any
 from backend.config import Config
 
+logger = logging.getLogger(__name__)
+
 class VectorDBService:
-    def __init__(self):
-        self.client = chromadb.HttpClient(host=Config.CHROMA_HOST, port=Config.CHROMA_PORT)
+    def __init__(self, client=None, embedding_function=None):
+        # An in-process client (e.g. chromadb.EphemeralClient) can be passed for offline runs
+        self.client = client or chromadb.HttpClient(host=Config.CHROMA_HOST, port=Config.CHROMA_PORT)
+        collection_options = {"embedding_function": embedding_function} if embedding_function else {}
         self.collection = self.client.get_or_create_collection(
             name="geospatial_knowledge",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            **collection_options
         )
         self._initialize_knowledge_base()
     
@@ -22,14 +28,13 @@ class VectorDBService:
 # Buffer analysis example
 import geopandas as gpd
 from shapely.geometry import Point
+# to_local_crs and reproject are provided by the execution environment
 
 def create_buffer(gdf, distance, units='meters'):
-    if gdf.crs and gdf.crs.to_string() != 'EPSG:4326':
-        # Project to appropriate CRS for accurate distance calculation
-        if units == 'meters':
-            gdf_projected = gdf.to_crs('EPSG:3857')  # Web Mercator
-        else:
-            gdf_projected = gdf.copy()
+    if units == 'meters' and gdf.crs:
+        # Buffer in the local UTM zone (or a data-centred projection for wide
+        # extents) so distances stay true at any latitude
+        gdf_projected = to_local_crs(gdf)
     else:
         gdf_projected = gdf.copy()
     
@@ -39,7 +44,7 @@ def create_buffer(gdf, distance, units='meters'):
     
     # Project back to original CRS
     if gdf.crs:
-        buffered = buffered.to_crs(gdf.crs)
+        buffered = reproject(buffered, gdf.crs)
     
     return buffered
 
@@ -79,14 +84,19 @@ result = spatial_join_analysis(left_layer, right_layer, how='inner', predicate='
 # Distance analysis example
 import geopandas as gpd
 import numpy as np
+# to_local_crs and reproject are provided by the execution environment
 
 def calculate_distances(gdf, target_point=None, to_nearest=False):
-    if gdf.crs and gdf.crs.to_string() != 'EPSG:4326':
-        gdf_projected = gdf.to_crs('EPSG:3857')  # Web Mercator for meters
+    if gdf.crs:
+        # Local projected CRS in meters; Web Mercator overstates distances away from the equator
+        gdf_projected = to_local_crs(gdf)
+        if target_point is not None:
+            target_point = reproject(gpd.GeoDataFrame(geometry=[target_point], crs=gdf.crs),
+                                     gdf_projected.crs).geometry.iloc[0]
     else:
         gdf_projected = gdf.copy()
     
-    if target_point:
+    if target_point is not None:
         # Distance to specific point
         distances = gdf_projected.geometry.distance(target_point)
     elif to_nearest:
@@ -109,20 +119,20 @@ result = calculate_distances(input_gdf, target_point=target_geometry)
             }
         ]
         
-        # Add to vector database
+        # Add to vector database (upsert so updated recipes replace stored copies)
         for item in knowledge_base:
             try:
-                self.collection.add(
+                self.collection.upsert(
                     ids=[item["id"]],
                     documents=[item["code"]],
                     metadatas=[{
                         "operation": item["operation"],
                         "description": item["description"],
-                        "parameters": item["parameters"]
+                        "parameters": ", ".join(item["parameters"])  # metadata values must be scalars
                     }]
                 )
             except Exception as e:
-                print(f"Failed to add {item['id']} to vector database: {e}")
+                logger.warning("Failed to add %s to vector database: %s", item['id'], e)
     
     def search_similar_code(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
         """Search for similar code examples"""
@@ -143,7 +153,7 @@ result = calculate_distances(input_gdf, target_point=target_geometry)
             
             return formatted_results
         except Exception as e:
-            print(f"Vector search failed: {e}")
+            logger.warning("Vector search failed: %s", e)
             return []
     
     def add_code_example(self, operation_id: str, code: str, metadata: Dict[str, Any]) -> bool:
@@ -156,5 +166,5 @@ result = calculate_distances(input_gdf, target_point=target_geometry)
             )
             return True
         except Exception as e:
-            print(f"Failed to add code example: {e}")
+            logger.warning("Failed to add code example %s: %s", operation_id, e)
             return False
\ No newline at end of file
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from typing import Iterable, List, Tuple
+
+
+def touch(path: str) -> None:
+    """Mark a cache file as recently used"""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write a cache file so concurrent readers never see a partial file.
+
+    Each writer fills its own temporary file, so threads, greenlets and processes
+    writing the same entry at once never share one; the last replace wins.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def directory_size(directory: str, suffix: str = "") -> int:
+    """Total size in bytes of the cache files under a directory"""
+    return sum(size for _, size, _ in _cache_files(directory, suffix))
+
+
+def evict_lru(directory: str, max_bytes: int, suffix: str = "", keep: Iterable[str] = ()) -> List[str]:
+    """Delete least recently used files until the directory fits in max_bytes.
+
+    Recency is the file mtime, which ``touch`` bumps on every hit, so the
+    bookkeeping is shared by every process using the same cache directory.
+    Paths in keep (e.g. the entry just written) are never evicted.
+    """
+    files = _cache_files(directory, suffix)
+    total = sum(size for _, size, _ in files)
+    keep = {os.path.abspath(path) for path in keep}
+    evicted = []
+    for path, size, _ in sorted(files, key=lambda item: item[2]):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted.append(path)
+    return evicted
+
+
+def _cache_files(directory: str, suffix: str) -> List[Tuple[str, int, float]]:
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith(suffix) or name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+    return files
@@ -0,0 +1,106 @@
+from functools import lru_cache
+from typing import Any, Tuple
+import geopandas as gpd
+from geopandas.array import GeometryArray
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS, Transformer
+
+WGS84 = "EPSG:4326"
+
+# Widest longitude span that still fits comfortably in one UTM zone
+UTM_MAX_SPAN_DEGREES = 6.0
+
+
+@lru_cache(maxsize=256)
+def _cached_transformer(src_srs: str, dst_srs: str) -> Transformer:
+    return Transformer.from_crs(CRS.from_user_input(src_srs), CRS.from_user_input(dst_srs), always_xy=True)
+
+
+def get_transformer(src_crs: Any, dst_crs: Any) -> Transformer:
+    """Return a cached always_xy Transformer for a CRS pair"""
+    return _cached_transformer(_crs_key(src_crs), _crs_key(dst_crs))
+
+
+def local_crs(bounds: Tuple[float, float, float, float], src_crs: Any = WGS84, kind: str = "distance") -> CRS:
+    """Pick a projected CRS suited to data inside the given bounds.
+
+    Small extents get their UTM zone. Extents wider than a zone get a
+    projection centred on the data: azimuthal equidistant for distance work,
+    Lambert azimuthal equal-area when ``kind`` is ``"area"``.
+    Raises ValueError when the bounds are not finite, as for an empty layer.
+    """
+    if not np.all(np.isfinite(bounds)):
+        raise ValueError("Cannot choose a local CRS for data without a finite extent")
+    if CRS.from_user_input(src_crs) != CRS.from_user_input(WGS84):
+        bounds = get_transformer(src_crs, WGS84).transform_bounds(*bounds)
+    min_lon, min_lat, max_lon, max_lat = bounds
+    center_lon = (min_lon + max_lon) / 2
+    center_lat = (min_lat + max_lat) / 2
+
+    if kind == "area":
+        return CRS.from_proj4(
+            f"+proj=laea +lat_0={center_lat:.4f} +lon_0={center_lon:.4f} +datum=WGS84 +units=m +no_defs"
+        )
+
+    if max_lon - min_lon <= UTM_MAX_SPAN_DEGREES and abs(center_lat) < 84:
+        zone = min(int((center_lon + 180) // 6) + 1, 60)
+        return CRS.from_epsg((32600 if center_lat >= 0 else 32700) + zone)
+
+    return CRS.from_proj4(
+        f"+proj=aeqd +lat_0={center_lat:.4f} +lon_0={center_lon:.4f} +datum=WGS84 +units=m +no_defs"
+    )
+
+
+def reproject(gdf, dst_crs: Any):
+    """Reproject a GeoDataFrame using a cached transformer on vectorized coordinate arrays"""
+    src_crs = gdf.crs
+    if src_crs is None:
+        raise ValueError("Cannot reproject data without a CRS")
+
+    dst_crs = CRS.from_user_input(dst_crs)
+    if src_crs == dst_crs:
+        return gdf.copy()
+
+    transformer = get_transformer(src_crs, dst_crs)
+
+    def _transform_coords(coords: np.ndarray) -> np.ndarray:
+        return np.column_stack(transformer.transform(*coords.T))
+
+    geometry = gdf.geometry
+    geometries = np.asarray(geometry.values).copy()
+    # 3D geometries keep their transformed z; 2D ones go without, since the NaN z that
+    # include_z would pass them voids x and y in height-aware transforms
+    has_z = shapely.has_z(geometries)
+    geometries[~has_z] = shapely.transform(geometries[~has_z], _transform_coords)
+    if has_z.any():
+        geometries[has_z] = shapely.transform(geometries[has_z], _transform_coords, include_z=True)
+
+    # Copy only the attributes (gdf.copy() would also clone every input geometry) and
+    # wrap the transformed array directly, since GeoSeries(ndarray) re-validates each one
+    result = pd.DataFrame(gdf.drop(columns=[geometry.name]))
+    result.insert(gdf.columns.get_loc(geometry.name), geometry.name,
+                  gpd.GeoSeries(GeometryArray(geometries, crs=dst_crs), index=gdf.index))
+    return gpd.GeoDataFrame(result, geometry=geometry.name)
+
+
+def to_local_crs(gdf, kind: str = "distance"):
+    """Reproject a GeoDataFrame to the local projected CRS chosen from its bounds.
+
+    A layer with no extent (empty, or only empty geometries) is returned unchanged.
+    """
+    if gdf.crs is None:
+        raise ValueError("Cannot choose a local CRS for data without a CRS")
+    if not np.all(np.isfinite(gdf.total_bounds)):
+        return gdf.copy()
+    return reproject(gdf, local_crs(tuple(gdf.total_bounds), gdf.crs, kind=kind))
+
+
+def _crs_key(crs: Any) -> str:
+    """Cheap hashable key for a CRS; equivalent CRSs spelled differently just get separate entries"""
+    if isinstance(crs, CRS):
+        return crs.srs
+    if isinstance(crs, (str, int)):
+        return str(crs) if not isinstance(crs, int) else f"EPSG:{crs}"
+    return CRS.from_user_input(crs).to_wkt()
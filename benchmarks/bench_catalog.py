@@ -0,0 +1,113 @@
+"""Dataset catalog lookup at scale and the planner prompt tokens it saves.
+
+Builds a catalog of synthetic city/theme datasets (default 100k), runs a set of
+planner queries with and without a map bbox, and reports build time, lookup
+latency, whether the datasets each query needs made it into the prompt, and the
+planner "Available Data" tokens against listing every dataset.
+
+Usage: python -m benchmarks.bench_catalog [--datasets 100000] [--top-k 8] [--token-budget 600]
+"""
+import argparse
+import time
+import numpy as np
+from backend.agents.planner import PlannerAgent
+from backend.services.dataset_catalog import DatasetCatalog, estimate_tokens
+
+CITIES = {
+    "delhi": (77.2, 28.6), "mumbai": (72.88, 19.08), "bengaluru": (77.59, 12.97), "chennai": (80.27, 13.08),
+    "kolkata": (88.36, 22.57), "hyderabad": (78.49, 17.39), "pune": (73.86, 18.52), "jaipur": (75.79, 26.91),
+    "london": (-0.13, 51.51), "paris": (2.35, 48.86), "berlin": (13.4, 52.52), "madrid": (-3.7, 40.42),
+    "nairobi": (36.82, -1.29), "lagos": (3.38, 6.52), "cairo": (31.24, 30.04), "johannesburg": (28.05, -26.2),
+    "tokyo": (139.69, 35.69), "seoul": (126.98, 37.57), "jakarta": (106.85, -6.21), "manila": (120.98, 14.6),
+    "sydney": (151.21, -33.87), "auckland": (174.76, -36.85), "toronto": (-79.38, 43.65), "chicago": (-87.63, 41.88),
+    "lima": (-77.04, -12.05), "bogota": (-74.07, 4.71), "santiago": (-70.67, -33.45), "mexico_city": (-99.13, 19.43),
+}
+
+THEMES = {
+    "roads": ("LineString", ["road_id", "name", "highway", "lanes", "surface", "maxspeed"]),
+    "schools": ("Point", ["school_id", "name", "type", "capacity", "board"]),
+    "hospitals": ("Point", ["hospital_id", "name", "beds", "emergency"]),
+    "wards": ("Polygon", ["ward_id", "ward_name", "zone", "population"]),
+    "rivers": ("LineString", ["river_id", "name", "width_m"]),
+    "buildings": ("Polygon", ["building_id", "height", "levels", "use"]),
+    "parks": ("Polygon", ["park_id", "name", "area_ha"]),
+    "bus_stops": ("Point", ["stop_id", "name", "routes"]),
+    "railways": ("LineString", ["line_id", "name", "gauge", "electrified"]),
+    "landuse": ("Polygon", ["landuse_id", "class", "source_year"]),
+    "elevation": (None, []),
+    "rainfall": (None, []),
+}
+
+QUERIES = [
+    ("Create a 500 meter buffer around all major roads in Delhi", "delhi", ["roads"]),
+    ("Which schools are inside each ward in Mumbai?", "mumbai", ["schools", "wards"]),
+    ("Find the distance from every hospital to the nearest bus stop in Nairobi", "nairobi", ["hospitals", "bus_stops"]),
+    ("Mean elevation of each park in Bengaluru", "bengaluru", ["elevation", "parks"]),
+    ("Buildings within 100 m of the railway lines", "london", ["buildings", "railways"]),
+    ("Total rainfall per ward", "jakarta", ["rainfall", "wards"]),
+]
+
+def synthetic_records(count: int, seed: int = 42):
+    """Datasets named <city>_<theme>_<year>, with extents around their city"""
+    rng = np.random.default_rng(seed)
+    cities, themes = list(CITIES), list(THEMES)
+    for data_id in range(1, count + 1):
+        city = cities[rng.integers(len(cities))]
+        theme = themes[rng.integers(len(themes))]
+        year = 2010 + int(rng.integers(15))
+        geometry_type, columns = THEMES[theme]
+        lon, lat = CITIES[city]
+        half = rng.uniform(0.05, 0.5)
+        bounds = [lon - half, lat - half * 0.8, lon + half, lat + half * 0.8]
+        if geometry_type:
+            summary = {"geometry_type": geometry_type, "feature_count": int(rng.integers(10, 200000)),
+                       "columns": columns, "crs": "EPSG:4326", "bounds": bounds}
+            name, data_type = f"{city}_{theme}_{year}.geojson", "vector"
+        else:
+            summary = {"bands": 1, "dtype": "float32", "width": 4000, "height": 3000, "crs": "EPSG:4326", "bounds": bounds}
+            name, data_type = f"{city}_{theme}_{year}.tif", "raster"
+        yield {"id": data_id, "name": name, "data_type": data_type, "metadata": {"summary": summary}}
+
+def city_bbox(city: str):
+    lon, lat = CITIES[city]
+    return [lon - 0.3, lat - 0.25, lon + 0.3, lat + 0.25]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--datasets", type=int, default=100000)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--token-budget", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=20, help="lookups per query for latency percentiles")
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.datasets))
+    started = time.perf_counter()
+    catalog = DatasetCatalog(records)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"catalog of {len(catalog)} datasets built in {build_ms:.0f} ms")
+
+    planner = PlannerAgent.__new__(PlannerAgent)  # only the prompt formatting is used
+    everything = [{"id": r["id"], "name": r["name"], "data_type": r["data_type"]} for r in records]
+    naive_tokens = estimate_tokens(planner._format_available_data(everything))
+    print(f"listing every dataset: {naive_tokens:,} prompt tokens")
+
+    print(f"{'query':60s} {'bbox':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'tokens':>7s} {'needed':>7s}")
+    for query, city, themes in QUERIES:
+        for bbox in (None, city_bbox(city)):
+            latencies = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                entries = catalog.search(query, bbox, top_k=args.top_k)
+                selected = catalog.prompt_entries(entries, token_budget=args.token_budget)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            tokens = estimate_tokens(planner._format_available_data(selected))
+            # Needed: the query's themes for its city, in any year
+            found = sum(any(item["name"].startswith(f"{city}_{theme}_") for item in selected) for theme in themes)
+            print(f"{query[:60]:60s} {'yes' if bbox else 'no':>5s} {np.percentile(latencies, 50):8.2f} "
+                  f"{np.percentile(latencies, 95):8.2f} {tokens:7d} {found:>4d}/{len(themes)}")
+
+    print(f"prompt size reduced {naive_tokens / max(tokens, 1):,.0f}x against listing every dataset")
+
+if __name__ == "__main__":
+    main()
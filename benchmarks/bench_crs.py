@@ -0,0 +1,83 @@
+"""Benchmark repeated reprojection with and without the cached transformer.
+
+Compares building a new pyproj Transformer on every call (as hand-written
+pyproj/shapely code does), GeoDataFrame.to_crs, and the cached reproject
+helper, both for one large layer and for many small calls where transformer
+construction dominates.
+
+Usage: python -m benchmarks.bench_crs [--points 1000000] [--repeats 5]
+"""
+import argparse
+import time
+import geopandas as gpd
+import numpy as np
+import shapely
+from geopandas.array import GeometryArray
+from pyproj import Transformer
+from backend.utils.geospatial import local_crs, reproject
+
+
+def make_points(n_points: int) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(42)
+    # Random points over Delhi NCR
+    lon = rng.uniform(76.8, 77.6, n_points)
+    lat = rng.uniform(28.3, 28.9, n_points)
+    return gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon, lat), crs="EPSG:4326")
+
+
+def time_runs(func, repeats: int) -> list:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def reproject_uncached(gdf, dst_crs):
+    transformer = Transformer.from_crs(gdf.crs, dst_crs, always_xy=True)
+    geometries = shapely.transform(
+        np.asarray(gdf.geometry.values),
+        lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+    )
+    return gpd.GeoDataFrame(gdf.drop(columns="geometry"), geometry=GeometryArray(geometries, crs=dst_crs))
+
+
+def report(title: str, gdf, target_crs, repeats: int):
+    print(title)
+    variants = (
+        ("new Transformer per call", lambda: reproject_uncached(gdf, target_crs)),
+        ("GeoDataFrame.to_crs", lambda: gdf.to_crs(target_crs)),
+        ("reproject (cached)", lambda: reproject(gdf, target_crs)),
+    )
+    baseline = None
+    for label, func in variants:
+        timings = time_runs(func, repeats)
+        baseline = baseline or np.mean(timings)
+        print(f"  {label:26s} mean {np.mean(timings) * 1000:9.2f} ms  min {np.min(timings) * 1000:9.2f} ms  "
+              f"speedup {baseline / np.mean(timings):.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    gdf = make_points(args.points)
+    target_crs = local_crs(tuple(gdf.total_bounds))
+    print(f"{args.points} points, target CRS {target_crs.to_string()}")
+
+    report(f"one layer of {args.points} points:", gdf, target_crs, args.repeats)
+    report("repeated small layers (1000 points):", gdf.iloc[:1000], target_crs, 200)
+
+    # Distance distortion of Web Mercator at this latitude, for reference
+    sample = gdf.iloc[:2]
+    mercator = sample.to_crs("EPSG:3857")
+    local = reproject(sample, target_crs)
+    ratio = mercator.geometry.iloc[0].distance(mercator.geometry.iloc[1]) / local.geometry.iloc[0].distance(local.geometry.iloc[1])
+    print(f"EPSG:3857 distance scale error vs local CRS: {ratio:.3f}x")
+
+
+if __name__ == "__main__":
+    main()
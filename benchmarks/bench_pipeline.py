@@ -0,0 +1,320 @@
+"""Offline end-to-end benchmark of the job pipeline.
+
+Runs the real FastAPI app and Celery task against local stand-ins:
+  * a fake OpenAI-compatible server with configurable latency and canned
+    plans/code (benchmarks/fake_openai.py)
+  * fakeredis for the job status store
+  * an in-memory Celery broker with embedded thread-pool workers: one per
+    queue with --pipeline split (the default), one for everything with single
+  * SQLite for the job and dataset tables
+  * an in-process Chroma client with a hashing embedding function
+
+It uploads synthetic datasets through the API, replays a JSONL workload
+(lines with "query", or "title"/"body" as in requests.jsonl), and reports
+throughput plus p50/p95/p99 for every recorded pipeline stage. Results are
+written as JSON so runs can be compared across commits with --compare.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_pipeline --jobs 40 --concurrency 8 --llm-latency-ms 800
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_openai import CannedResponder, FakeOpenAIServer
+
+PERCENTILES = (50, 95, 99)
+
+
+class HashingEmbeddingFunction:
+    """Offline bag-of-words embedding so Chroma needs no model download"""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        embeddings = []
+        for text in input:
+            vector = np.zeros(self.dimensions)
+            for token in text.lower().split():
+                vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+            norm = np.linalg.norm(vector)
+            embeddings.append((vector / norm if norm else vector).tolist())
+        return embeddings
+
+
+def load_workload(path: str) -> List[str]:
+    queries = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            queries.append(item.get("query") or f"{item.get('title', '')}. {item.get('body', '')}")
+    return queries
+
+
+def write_datasets(directory: str, n_features: int) -> Dict[str, str]:
+    """Synthetic roads, schools and wards over Delhi NCR"""
+    import geopandas as gpd
+    from shapely.geometry import LineString, box
+
+    rng = np.random.default_rng(7)
+    lon = rng.uniform(76.9, 77.5, n_features)
+    lat = rng.uniform(28.4, 28.8, n_features)
+
+    roads = gpd.GeoDataFrame(
+        {"road_id": np.arange(n_features)},
+        geometry=[LineString([(x, y), (x + 0.01, y + 0.005)]) for x, y in zip(lon, lat)],
+        crs="EPSG:4326"
+    )
+    schools = gpd.GeoDataFrame(
+        {"school_id": np.arange(n_features)},
+        geometry=gpd.points_from_xy(lon[::-1], lat),
+        crs="EPSG:4326"
+    )
+    cells = [(x, y) for x in np.arange(76.9, 77.5, 0.05) for y in np.arange(28.4, 28.8, 0.05)]
+    wards = gpd.GeoDataFrame(
+        {"ward_id": np.arange(len(cells))},
+        geometry=[box(x, y, x + 0.05, y + 0.05) for x, y in cells],
+        crs="EPSG:4326"
+    )
+
+    paths = {}
+    for name, gdf in (("roads.geojson", roads), ("schools.geojson", schools), ("wards.geojson", wards)):
+        paths[name] = os.path.join(directory, name)
+        gdf.to_file(paths[name], driver="GeoJSON")
+    return paths
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary["mean"] = round(float(np.mean(values)), 3)
+    summary["count"] = len(values)
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="geospatial-bench-")
+
+    responder = CannedResponder()
+    llm = FakeOpenAIServer(responder, latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms).start()
+
+    # Config is read at import time, so the environment must be in place first
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "REDIS_URL": "redis://localhost:6379/0",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": llm.base_url,
+        "DATASET_CACHE_DIR": os.path.join(workdir, "cache", "datasets"),
+        "RESULT_CACHE_DIR": os.path.join(workdir, "cache", "results"),
+        "TILE_CACHE_DIR": os.path.join(workdir, "cache", "tiles"),
+        "RESULT_CACHE_ENABLED": "false" if args.no_result_cache else "true",
+        "CODE_TEMPLATES_ENABLED": "false" if args.no_templates else "true",
+        "PIPELINE_MODE": args.pipeline,
+        "METRICS_ENABLED": "true",
+    })
+
+    import chromadb
+    import fakeredis
+    from celery.contrib.testing.worker import start_worker
+    from fastapi.testclient import TestClient
+
+    # The app mounts frontend/static relative to the working directory
+    os.chdir(REPO_ROOT)
+    import backend.app as app_module
+    import backend.agents.coder as coder_module
+    import backend.services.job_queue as job_queue_module
+    from backend.models.migrate import migrate
+    from backend.services.vector_db import VectorDBService
+    os.chdir(workdir)
+
+    migrate()
+
+    job_queue_module._redis_client = fakeredis.FakeRedis()
+
+    vector_store = VectorDBService(client=chromadb.EphemeralClient(), embedding_function=HashingEmbeddingFunction())
+    coder_module.VectorDBService = lambda: vector_store
+
+    celery_app = job_queue_module.celery_app
+    # The memory transport polls its queues (every second by default) where Redis blocks on them,
+    # and the worker loop used with it waits up to 2 s for messages once its prefetch window is full
+    celery_app.conf.update(broker_url="memory://", broker_transport_options={"polling_interval": 0.01},
+                           worker_prefetch_multiplier=4, result_backend="cache+memory://",
+                           worker_hijack_root_logger=False)
+
+    # The client context runs the app's lifespan startup and shutdown
+    with TestClient(app_module.app) as client:
+        for name, path in write_datasets(workdir, args.features).items():
+            with open(path, "rb") as f:
+                response = client.post("/api/data/upload", files={"file": (name, f, "application/geo+json")})
+            response.raise_for_status()
+            responder.dataset_ids[name] = response.json()["data_id"]
+
+        queries = load_workload(args.workload)
+        queries = [queries[i % len(queries)] for i in range(args.jobs)]
+
+        def submit_and_wait(query: str) -> Dict[str, Any]:
+            start = time.perf_counter()
+            job_id = client.post("/api/jobs/", json={"query": query, "profile": args.profile}).json()["job_id"]
+            while True:
+                job = client.get(f"/api/jobs/{job_id}", params={"include_data": "false"}).json()
+                if job["status"] in ("completed", "failed"):
+                    break
+                time.sleep(args.poll_interval_ms / 1000)
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "error": job["error_message"],
+                "end_to_end_ms": (time.perf_counter() - start) * 1000
+            }
+
+        with ExitStack() as workers:
+            if args.pipeline == "split":
+                # LLM stages on a wide I/O pool, execution on a pool sized like the single-queue worker
+                workers.enter_context(start_worker(celery_app, pool="threads", concurrency=args.io_concurrency,
+                                                   queues=["io"], perform_ping_check=False, shutdown_timeout=60))
+                workers.enter_context(start_worker(celery_app, pool="threads", concurrency=args.worker_concurrency,
+                                                   queues=["cpu", "celery"], perform_ping_check=False,
+                                                   shutdown_timeout=60))
+            else:
+                workers.enter_context(start_worker(celery_app, pool="threads", concurrency=args.worker_concurrency,
+                                                   perform_ping_check=False, shutdown_timeout=60))
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                outcomes = list(pool.map(submit_and_wait, queries))
+            wall_seconds = time.perf_counter() - started
+
+        llm.stop()
+
+        stages: Dict[str, List[float]] = {"end_to_end": [o["end_to_end_ms"] for o in outcomes]}
+        tokens: Dict[str, List[int]] = {}
+        coder_ms: Dict[str, List[float]] = {}
+        for outcome in outcomes:
+            job_metrics = client.get(f"/api/jobs/{outcome['job_id']}/metrics").json()["metrics"] or {}
+            job_stages = job_metrics.get("stages_ms", {})
+            for stage, duration in job_stages.items():
+                stages.setdefault(stage, []).append(duration)
+            # Time spent producing code, by where the code came from
+            source = job_metrics.get("labels", {}).get("code_source")
+            if source:
+                coder_ms.setdefault(source, []).append(
+                    sum(job_stages.get(stage, 0.0) for stage in ("template_compile", "retrieval", "coder_llm"))
+                )
+            for agent, counts in job_metrics.get("tokens", {}).items():
+                tokens.setdefault(agent, []).append(counts.get("total_tokens", 0))
+
+    completed = [o for o in outcomes if o["status"] == "completed"]
+    template_jobs, llm_jobs = coder_ms.get("template", []), coder_ms.get("llm", [])
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "jobs": len(outcomes),
+        "completed": len(completed),
+        "failed": len(outcomes) - len(completed),
+        "errors": sorted({o["error"] for o in outcomes if o["error"]})[:5],
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_jobs_per_s": round(len(completed) / wall_seconds, 3) if wall_seconds else 0.0,
+        "stages_ms": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+        "tokens_per_job": {agent: percentiles(values) for agent, values in tokens.items()},
+        "code_source": {
+            "template_fraction": round(len(template_jobs) / (len(template_jobs) + len(llm_jobs)), 3)
+            if template_jobs or llm_jobs else 0.0,
+            "coder_ms": {source: percentiles(values) for source, values in coder_ms.items()},
+            # Mean coder time of an LLM job minus that of a template job, per template job
+            "saved_ms_per_template_job": round(float(np.mean(llm_jobs) - np.mean(template_jobs)), 3)
+            if template_jobs and llm_jobs else None,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"revision {report['revision']}: {report['completed']}/{report['jobs']} jobs completed "
+          f"in {report['wall_seconds']:.2f}s, {report['throughput_jobs_per_s']:.2f} jobs/s")
+    if baseline:
+        change = report["throughput_jobs_per_s"] / baseline["throughput_jobs_per_s"] - 1 if baseline["throughput_jobs_per_s"] else 0
+        print(f"  vs {baseline['revision']}: {baseline['throughput_jobs_per_s']:.2f} jobs/s ({change:+.1%})")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+    code_source = report["code_source"]
+    if code_source["coder_ms"]:
+        saved = code_source["saved_ms_per_template_job"]
+        print(f"  {code_source['template_fraction']:.0%} of jobs compiled from templates"
+              + (f", saving {saved:.0f} ms of code generation each" if saved is not None else ""))
+
+    print(f"{'stage':16s} {'p50':>10s} {'p95':>10s} {'p99':>10s}" + ("   p50 vs baseline" if baseline else ""))
+    for stage, summary in report["stages_ms"].items():
+        line = f"{stage:16s} " + " ".join(f"{summary[f'p{p}']:10.1f}" for p in PERCENTILES)
+        base = (baseline or {}).get("stages_ms", {}).get(stage)
+        if base and base.get("p50"):
+            line += f"   {summary['p50'] / base['p50'] - 1:+.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default=os.path.join(REPO_ROOT, "benchmarks", "workloads", "mixed.jsonl"))
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent API clients")
+    parser.add_argument("--worker-concurrency", type=int, default=4,
+                        help="Celery worker threads (the CPU queue's with --pipeline split)")
+    parser.add_argument("--pipeline", choices=("split", "single"), default="split",
+                        help="stage tasks on I/O and CPU queues, or one task per job")
+    parser.add_argument("--io-concurrency", type=int, default=32, help="I/O queue worker threads with --pipeline split")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--features", type=int, default=2000, help="features per synthetic dataset")
+    parser.add_argument("--poll-interval-ms", type=float, default=50.0)
+    parser.add_argument("--no-result-cache", action="store_true")
+    parser.add_argument("--no-templates", action="store_true", help="send every plan to the coder LLM")
+    parser.add_argument("--profile", action="store_true", help="submit jobs with profiling on, to measure its overhead")
+    parser.add_argument("--output", help="result JSON path (default benchmarks/results/<revision>-<time>.json)")
+    parser.add_argument("--compare", help="baseline result JSON to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", f"{report['revision'] or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Import-time and cold-start profile of the web process.
+
+Each run starts a fresh interpreter, imports backend.app with -X importtime,
+runs the app lifespan and serves one /api/health request. Reports the
+slowest imports and fails (exit 1) if the web process pulls in the
+geospatial stack or exceeds the given budgets, so it can run as a CI check.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--max-import-ms 1500] [--max-startup-ms 3000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the worker needs; importing any of them in the web process is a regression
+HEAVY_MODULES = ("geopandas", "shapely", "pandas", "numpy", "pyproj", "pyarrow", "rasterio", "fiona",
+                 "chromadb", "openai", "mapbox_vector_tile")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(backend.app.app) as client:
+    client.get("/api/health").raise_for_status()
+ready = time.perf_counter()
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"import_ms": (imported - start) * 1000, "ready_ms": (ready - start) * 1000, "heavy": heavy}}))
+"""
+
+
+def probe(env) -> dict:
+    """One cold start in a fresh interpreter"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    result["importtime"] = parse_importtime(completed.stderr)
+    return result
+
+
+def parse_importtime(stderr: str) -> list:
+    """(cumulative_us, self_us, module) for each import line"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-import-ms", type=float, help="fail if median import time exceeds this")
+    parser.add_argument("--max-startup-ms", type=float, help="fail if median time to first response exceeds this")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="geospatial-startup-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    env.setdefault("REDIS_URL", "redis://localhost:6379/0")
+    env.setdefault("TILE_CACHE_DIR", os.path.join(workdir, "tiles"))
+
+    runs = [probe(env) for _ in range(args.runs)]
+    import_ms = statistics.median([run["import_ms"] for run in runs])
+    ready_ms = statistics.median([run["ready_ms"] for run in runs])
+    process_ms = statistics.median([run["process_ms"] for run in runs])
+
+    print(f"median over {args.runs} cold starts:")
+    print(f"  import backend.app        {import_ms:8.1f} ms")
+    print(f"  lifespan + first request  {ready_ms:8.1f} ms")
+    print(f"  whole process             {process_ms:8.1f} ms")
+
+    print("slowest imports (cumulative, last run):")
+    for cumulative_us, self_us, module in sorted(runs[-1]["importtime"], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms self  {module.strip()}")
+
+    failures = []
+    heavy = sorted({module for run in runs for module in run["heavy"]})
+    if heavy:
+        failures.append(f"web process imported worker-only modules: {', '.join(heavy)}")
+    if args.max_import_ms and import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f} ms exceeds {args.max_import_ms:.0f} ms")
+    if args.max_startup_ms and ready_ms > args.max_startup_ms:
+        failures.append(f"startup time {ready_ms:.0f} ms exceeds {args.max_startup_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark vector tile generation against downloading the full job result.
+
+Builds a synthetic GeoDataFrame result, serializes it the way ExecutionEngine
+does, then renders every tile covering a 1280x800 viewport at several zooms,
+cold (empty tile cache) and warm.
+
+Usage: python -m benchmarks.bench_tiles [--features 50000]
+"""
+import argparse
+import json
+import math
+import tempfile
+import time
+import geopandas as gpd
+import numpy as np
+from backend.services.tile_service import TileService
+
+VIEWPORT = (1280, 800)
+
+
+def make_result(n_features: int) -> dict:
+    rng = np.random.default_rng(42)
+    # Buffered points over Delhi NCR, similar to a buffer_analysis result
+    lon = rng.uniform(76.8, 77.6, n_features)
+    lat = rng.uniform(28.3, 28.9, n_features)
+    gdf = gpd.GeoDataFrame(
+        {"feature_id": np.arange(n_features), "category": rng.choice(["road", "school", "clinic"], n_features)},
+        geometry=gpd.points_from_xy(lon, lat),
+        crs="EPSG:4326"
+    )
+    gdf["geometry"] = gdf.to_crs("EPSG:32643").buffer(150, 8).to_crs("EPSG:4326")
+    return {
+        "type": "GeoDataFrame",
+        "data": gdf.to_json(),
+        "crs": str(gdf.crs),
+        "shape": gdf.shape,
+        "columns": list(gdf.columns)
+    }
+
+
+def viewport_tiles(lon: float, lat: float, z: int):
+    """XYZ tiles covering the viewport centred on lon/lat"""
+    n = 1 << z
+    center_x = (lon + 180) / 360 * n
+    center_y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    half_w, half_h = VIEWPORT[0] / 512, VIEWPORT[1] / 512
+    for x in range(int(center_x - half_w), int(center_x + half_w) + 1):
+        for y in range(int(center_y - half_h), int(center_y + half_h) + 1):
+            yield x, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--features", type=int, default=50_000)
+    parser.add_argument("--zooms", default="9,11,13,15")
+    args = parser.parse_args()
+
+    result = make_result(args.features)
+    full_bytes = len(json.dumps(result).encode())
+    start = time.perf_counter()
+    json.loads(json.dumps(result))
+    print(f"full result download: {full_bytes / 1e6:.1f} MB (JSON round trip {time.perf_counter() - start:.2f}s)")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tiles = TileService(cache_dir=cache_dir)
+
+        start = time.perf_counter()
+        tiles._get_index("bench", lambda: result)
+        print(f"index build (once per job): {time.perf_counter() - start:.2f}s")
+
+        for z in (int(zoom) for zoom in args.zooms.split(",")):
+            coords = list(viewport_tiles(77.2, 28.6, z))
+            for label in ("cold", "warm"):
+                latencies, total_bytes = [], 0
+                for x, y in coords:
+                    start = time.perf_counter()
+                    total_bytes += len(tiles.get_tile("bench", lambda: result, z, x, y))
+                    latencies.append(time.perf_counter() - start)
+                print(
+                    f"z{z:<2d} {label}: {len(coords)} tiles, {total_bytes / 1e3:.1f} kB per viewport, "
+                    f"p50 {np.percentile(latencies, 50) * 1e3:.1f} ms, max {max(latencies) * 1e3:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Minimal OpenAI-compatible chat completions server with canned responses.
+
+Used by the pipeline benchmark so that planner and coder round trips cost a
+configurable latency instead of a real GPT-4 call. Responses are chosen by
+matching keywords in the prompt against a small set of analysis scenarios.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+# Canned scenarios, keyed by analysis_type. Plans reference datasets by name;
+# the responder swaps in the uploaded dataset ids.
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    # No code template covers calculate_area, so this one always reaches the coder LLM
+    "area_analysis": {
+        "keywords": ["area of", "square"],
+        "steps": [
+            {"operation": "load_data", "dataset": "wards.geojson"},
+            {"operation": "calculate_area", "parameters": {"units": "km2"}}
+        ],
+        "code": (
+            "wards = input_data['datasets']['wards.geojson']\n"
+            "projected = to_local_crs(wards, kind='area')\n"
+            "result = wards.assign(area_km2=projected.geometry.area / 1e6)\n"
+        )
+    },
+    "buffer_analysis": {
+        "keywords": ["buffer", "within", "around"],
+        "steps": [
+            {"operation": "load_data", "dataset": "roads.geojson"},
+            {"operation": "buffer", "parameters": {"distance": 500, "units": "meters"}}
+        ],
+        "code": (
+            "roads = input_data['datasets']['roads.geojson']\n"
+            "projected = to_local_crs(roads)\n"
+            "projected['geometry'] = projected.geometry.buffer(500)\n"
+            "result = reproject(projected, roads.crs)\n"
+        )
+    },
+    "spatial_join": {
+        "keywords": ["join", "inside", "contain", "ward"],
+        "steps": [
+            {"operation": "load_data", "dataset": "schools.geojson"},
+            {"operation": "load_data", "dataset": "wards.geojson"},
+            {"operation": "spatial_join", "parameters": {"how": "inner", "predicate": "within"}}
+        ],
+        "code": (
+            "schools = input_data['datasets']['schools.geojson']\n"
+            "wards = input_data['datasets']['wards.geojson']\n"
+            "result = gpd.sjoin(schools, wards, how='inner', predicate='within')\n"
+        )
+    },
+    "distance_analysis": {
+        "keywords": ["distance", "nearest", "far", "closest"],
+        "steps": [
+            {"operation": "load_data", "dataset": "schools.geojson"},
+            {"operation": "load_data", "dataset": "roads.geojson"},
+            {"operation": "distance", "parameters": {"to_nearest": True}}
+        ],
+        "code": (
+            "schools = input_data['datasets']['schools.geojson']\n"
+            "roads = input_data['datasets']['roads.geojson']\n"
+            "target_crs = local_crs(tuple(schools.total_bounds), schools.crs)\n"
+            "joined = gpd.sjoin_nearest(reproject(schools, target_crs), reproject(roads, target_crs)[['geometry']], distance_col='distance')\n"
+            "result = reproject(joined, schools.crs)\n"
+        )
+    }
+}
+
+
+class CannedResponder:
+    """Builds planner and coder replies for the canned scenarios"""
+
+    def __init__(self):
+        self.dataset_ids: Dict[str, int] = {}
+
+    def __call__(self, messages: List[Dict[str, str]]) -> str:
+        system = messages[0]["content"]
+        prompt = messages[-1]["content"]
+        if "programmer" in system:
+            return json.dumps(self._code(prompt))
+        return json.dumps(self._plan(prompt))
+
+    def _scenario(self, text: str) -> str:
+        text = text.lower()
+        for name in SCENARIOS:
+            if name in text:
+                return name
+        for name, scenario in SCENARIOS.items():
+            if any(keyword in text for keyword in scenario["keywords"]):
+                return name
+        return "buffer_analysis"
+
+    def _plan(self, prompt: str) -> Dict[str, Any]:
+        name = self._scenario(prompt.split("Available Data:")[0])
+        steps = []
+        for number, step in enumerate(SCENARIOS[name]["steps"], start=1):
+            parameters = dict(step.get("parameters", {}))
+            if "dataset" in step:
+                parameters["dataset_id"] = self.dataset_ids[step["dataset"]]
+            steps.append({
+                "step_number": number,
+                "description": step["operation"].replace("_", " "),
+                "operation": step["operation"],
+                "parameters": parameters
+            })
+        return {"analysis_type": name, "steps": steps, "expected_output": "GeoDataFrame", "confidence": 0.9}
+
+    def _code(self, prompt: str) -> Dict[str, Any]:
+        name = self._scenario(prompt.split("Relevant examples")[0])
+        return {
+            "code": SCENARIOS[name]["code"],
+            "dependencies": ["geopandas"],
+            "input_requirements": [],
+            "output_description": "GeoDataFrame"
+        }
+
+
+class FakeOpenAIServer:
+    """Serves /v1/chat/completions from a responder on a local port"""
+
+    def __init__(self, responder, latency_ms: float = 0.0, jitter_ms: float = 0.0, host: str = "127.0.0.1"):
+        self.responder = responder
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.httpd = ThreadingHTTPServer((host, 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                delay = server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)
+                time.sleep(max(delay, 0.0) / 1000)
+
+                content = server.responder(body["messages"])
+                prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+                payload = json.dumps({
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(content) // 4,
+                        "total_tokens": prompt_tokens + len(content) // 4
+                    }
+                }).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
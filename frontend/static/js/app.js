@@ -2,6 +2,7 @@ class GeospatialAnalyzer {
     constructor() {
         this.currentJobId = null;
         this.map = null;
+        this.resultLayer = null;
         this.init();
     }
 
@@ -55,12 +56,15 @@ class GeospatialAnalyzer {
         this.showLoading('Submitting query...');
 
         try {
+            // The map view tells the planner which area's datasets matter most
+            const bounds = this.map.getBounds();
+            const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()];
             const response = await fetch('/api/jobs/', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ query })
+                body: JSON.stringify({ query, bbox })
             });
 
             const result = await response.json();
@@ -83,7 +87,7 @@ class GeospatialAnalyzer {
     async startJobStatusMonitoring(jobId) {
         const checkStatus = async () => {
             try {
-                const response = await fetch(`/api/jobs/${jobId}`);
+                const response = await fetch(`/api/jobs/${jobId}?include_data=false`);
                 const job = await response.json();
 
                 if (response.ok) {
@@ -153,10 +157,8 @@ class GeospatialAnalyzer {
                     </div>
                 `;
 
-                // Display data on map if available
-                if (job.result.data) {
-                    this.displayOnMap(job.result.data);
-                }
+                // Draw the result from vector tiles instead of the full GeoJSON
+                this.displayTilesOnMap(job.job_id);
             } else {
                 resultHtml += `
                     <h4><i class="fas fa-check-circle"></i> Analysis Complete</h4>
@@ -209,41 +211,47 @@ class GeospatialAnalyzer {
         `;
     }
 
-    displayOnMap(geoJsonData) {
+    async displayTilesOnMap(jobId) {
         try {
-            const geoData = typeof geoJsonData === 'string' ? JSON.parse(geoJsonData) : geoJsonData;
-            
-            // Clear existing layers
-            this.map.eachLayer(layer => {
-                if (layer instanceof L.GeoJSON) {
-                    this.map.removeLayer(layer);
-                }
-            });
+            const response = await fetch(`/api/jobs/${jobId}/tiles.json`);
+            const tileJson = await response.json();
+            if (!response.ok) {
+                return;
+            }
 
-            // Add new data
-            const geoJsonLayer = L.geoJSON(geoData, {
-                style: {
-                    color: '#667eea',
-                    weight: 2,
-                    fillColor: '#667eea',
-                    fillOpacity: 0.3
-                },
-                onEachFeature: (feature, layer) => {
-                    if (feature.properties) {
-                        let popupContent = '<div class="popup-content">';
-                        Object.entries(feature.properties).forEach(([key, value]) => {
-                            popupContent += `<p><strong>${key}:</strong> ${value}</p>`;
-                        });
-                        popupContent += '</div>';
-                        layer.bindPopup(popupContent);
+            // Clear the previous result layer
+            if (this.resultLayer) {
+                this.map.removeLayer(this.resultLayer);
+            }
+
+            this.resultLayer = L.vectorGrid.protobuf(tileJson.tiles[0], {
+                vectorTileLayerStyles: {
+                    result: {
+                        color: '#667eea',
+                        weight: 2,
+                        fill: true,
+                        fillColor: '#667eea',
+                        fillOpacity: 0.3
                     }
-                }
+                },
+                interactive: true,
+                maxNativeZoom: tileJson.maxzoom
+            }).on('click', (e) => {
+                let popupContent = '<div class="popup-content">';
+                Object.entries(e.layer.properties || {}).forEach(([key, value]) => {
+                    popupContent += `<p><strong>${key}:</strong> ${value}</p>`;
+                });
+                popupContent += '</div>';
+                L.popup().setLatLng(e.latlng).setContent(popupContent).openOn(this.map);
             }).addTo(this.map);
 
             // Fit map to bounds
-            this.map.fitBounds(geoJsonLayer.getBounds());
+            if (tileJson.bounds) {
+                const [west, south, east, north] = tileJson.bounds;
+                this.map.fitBounds([[south, west], [north, east]]);
+            }
         } catch (error) {
-            console.error('Error displaying on map:', error);
+            console.error('Error displaying tiles on map:', error);
         }
     }
 
@@ -359,7 +367,7 @@ class GeospatialAnalyzer {
 
     async checkJobStatus(jobId) {
         try {
-            const response = await fetch(`/api/jobs/${jobId}`);
+            const response = await fetch(`/api/jobs/${jobId}?include_data=false`);
             const job = await response.json();
             
             if (response.ok && job.status === 'completed') {
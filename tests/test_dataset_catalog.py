@@ -0,0 +1,26 @@
+from backend.services.dataset_catalog import DatasetCatalog
+
+CITIES = {"delhi": (77.2, 28.6), "paris": (2.35, 48.86), "lima": (-77.04, -12.05)}
+
+def record(data_id, city, theme):
+    lon, lat = CITIES[city]
+    summary = {"geometry_type": "Polygon", "columns": ["name"], "crs": "EPSG:4326",
+               "bounds": [lon - 0.2, lat - 0.2, lon + 0.2, lat + 0.2]}
+    return {"id": data_id, "name": f"{city}_{theme}.geojson", "data_type": "vector", "metadata": {"summary": summary}}
+
+def catalog():
+    records = [record(1, "delhi", "schools"), record(2, "paris", "wards"), record(3, "lima", "wards"),
+               record(4, "delhi", "wards"), record(5, "paris", "schools"), record(6, "lima", "schools")]
+    return DatasetCatalog(records)
+
+def test_bbox_away_from_every_match_falls_back_to_best_match_area():
+    new_york = [-74.35, 40.5, -73.65, 40.9]
+    without_bbox = catalog().search("schools in each ward", top_k=2)
+    with_bbox = catalog().search("schools in each ward", new_york, top_k=2)
+    assert [entry["id"] for entry in with_bbox] == [entry["id"] for entry in without_bbox]
+    assert len({entry["name"].split("_")[0] for entry in with_bbox}) == 1
+
+def test_bbox_over_matches_wins():
+    lon, lat = CITIES["lima"]
+    entries = catalog().search("schools in each ward", [lon - 0.1, lat - 0.1, lon + 0.1, lat + 0.1], top_k=2)
+    assert {entry["name"] for entry in entries} == {"lima_schools.geojson", "lima_wards.geojson"}
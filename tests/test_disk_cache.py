@@ -0,0 +1,18 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.disk_cache import atomic_write
+
+def test_concurrent_writers_of_one_entry(tmp_path):
+    path = str(tmp_path / "entry.bin")
+    payloads = [bytes([i]) * 100000 for i in range(8)]
+
+    def write(i):
+        for _ in range(20):
+            atomic_write(path, payloads[i])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    with open(path, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["entry.bin"]
@@ -0,0 +1,16 @@
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point
+from backend.utils.geospatial import local_crs, reproject
+
+def test_reproject_keeps_z():
+    gdf = gpd.GeoDataFrame({"name": ["flat", "raised", "line"]},
+                           geometry=[Point(1, 2), Point(1, 2, 30), LineString([(0, 0, 1), (1, 1, 2)])], crs=4326)
+    result = reproject(gdf, "EPSG:4978")
+    assert result.geometry.has_z.tolist() == [False, True, True]
+    assert not result.geometry.is_empty.any()
+    assert reproject(gdf, 3857).geometry.iloc[1].z == 30
+
+def test_local_crs_rejects_empty_extent():
+    with pytest.raises(ValueError):
+        local_crs(tuple(gpd.GeoDataFrame(geometry=[], crs=4326).total_bounds))
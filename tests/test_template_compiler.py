@@ -0,0 +1,27 @@
+import pytest
+from backend.agents.template_compiler import OVERLAY_HOW, TemplateCompiler
+
+DATASETS = {
+    "wards.geojson": {"dataset_id": 1, "file_path": "uploads/wards.geojson", "data_type": "vector"},
+    "parks.geojson": {"dataset_id": 2, "file_path": "uploads/parks.geojson", "data_type": "vector"},
+}
+
+def overlay_plan(operation, parameters=None):
+    return {"steps": [
+        {"step_number": 1, "operation": "load_data", "parameters": {"dataset_id": 1}},
+        {"step_number": 2, "operation": "load_data", "parameters": {"dataset_id": 2}},
+        {"step_number": 3, "operation": operation, "parameters": parameters or {}},
+    ]}
+
+@pytest.mark.parametrize("operation", sorted(OVERLAY_HOW))
+def test_overlay_alias_uses_its_own_how(operation):
+    code = TemplateCompiler().compile(overlay_plan(operation), DATASETS)["code"]
+    assert f"how={operation!r}" in code
+
+def test_overlay_defaults_to_intersection():
+    code = TemplateCompiler().compile(overlay_plan("overlay"), DATASETS)["code"]
+    assert "how='intersection'" in code
+
+def test_overlay_how_parameter_wins():
+    code = TemplateCompiler().compile(overlay_plan("overlay", {"how": "union"}), DATASETS)["code"]
+    assert "how='union'" in code
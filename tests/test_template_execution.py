@@ -0,0 +1,50 @@
+import geopandas as gpd
+import pytest
+from shapely.geometry import Point, box
+from backend.agents.template_compiler import TemplateCompiler
+
+@pytest.fixture
+def datasets(tmp_path, monkeypatch):
+    # The engine's dataset and result caches live under the working directory
+    monkeypatch.chdir(tmp_path)
+    layers = {
+        "schools.geojson": gpd.GeoDataFrame({"school": ["a", "b", "c"]},
+                                            geometry=[Point(0.1, 0.1), Point(0.6, 0.6), Point(1.5, 1.5)], crs=4326),
+        "wards.geojson": gpd.GeoDataFrame({"ward": [1, 2]}, geometry=[box(0, 0, 1, 1), box(1, 1, 2, 2)], crs=4326),
+        "zones.geojson": gpd.GeoDataFrame({"zone": ["x"]}, geometry=[box(0, 0, 2, 2)], crs=4326),
+        "clinics.geojson": gpd.GeoDataFrame({"clinic": [1, 2]}, geometry=[Point(0.2, 0.2), Point(1.4, 1.4)], crs=4326),
+    }
+    references = {}
+    for dataset_id, (name, gdf) in enumerate(layers.items(), start=1):
+        path = str(tmp_path / name)
+        gdf.to_file(path, driver="GeoJSON")
+        references[name] = {"dataset_id": dataset_id, "file_path": path, "data_type": "vector"}
+    return references
+
+def load(dataset_id):
+    return {"operation": "load_data", "parameters": {"dataset_id": dataset_id}}
+
+def execute(steps, datasets):
+    from backend.services.execution_engine import ExecutionEngine
+
+    plan = {"steps": [dict(step, step_number=number) for number, step in enumerate(steps, start=1)]}
+    code_result = TemplateCompiler().compile(plan, datasets)
+    assert code_result is not None
+    return ExecutionEngine().execute_code(code_result["code"], {"datasets": datasets}, code_result["dependencies"])
+
+def test_join_then_nearest_distance(datasets):
+    outcome = execute([load(1), load(2), {"operation": "spatial_join", "parameters": {}},
+                       load(4), {"operation": "distance", "parameters": {}}], datasets)
+    assert outcome["success"], outcome.get("error")
+
+def test_chained_spatial_joins(datasets):
+    outcome = execute([load(1), load(2), {"operation": "spatial_join", "parameters": {}},
+                       load(3), {"operation": "spatial_join", "parameters": {}}], datasets)
+    assert outcome["success"], outcome.get("error")
+    assert outcome["result"]["shape"][0] == 3
+
+def test_buffer_of_empty_join(datasets):
+    outcome = execute([load(4), load(3), {"operation": "spatial_join", "parameters": {"predicate": "contains"}},
+                       {"operation": "buffer", "parameters": {"distance": 100}}], datasets)
+    assert outcome["success"], outcome.get("error")
+    assert outcome["result"]["shape"][0] == 0
@@ -0,0 +1,15 @@
+from backend.services import tile_service
+from backend.services.tile_service import TileService
+from backend.utils.disk_cache import directory_size
+
+def test_tile_cache_stays_bounded_without_walking_on_every_miss(tmp_path, monkeypatch):
+    walks = []
+    monkeypatch.setattr(tile_service, "directory_size",
+                        lambda *args, **kwargs: walks.append(args) or directory_size(*args, **kwargs))
+    service = TileService(cache_dir=str(tmp_path), max_bytes=10000)
+    monkeypatch.setattr(service, "render_tile", lambda job_id, load_result, z, x, y: b"t" * 1000)
+
+    for x in range(100):
+        assert service.get_tile(1, dict, 10, x, 0) == b"t" * 1000
+        assert directory_size(str(tmp_path), suffix=".mvt") <= 10000
+    assert len(walks) == 1